@@ -1,11 +1,13 @@
 import streamlit as st
-from openai import OpenAI
 import os
 import json
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore
 import streamlit as st
+from with_llm.llm_chat import (
+    ChatStream, ContextWindow, UsageLedger, get_backend, get_circuit_breaker, get_scheduler
+)
 
 # Initialize Firebase once
 firebase_config = dict(st.secrets["FIREBASE"])
@@ -71,6 +73,10 @@ if "prestudy" not in st.session_state:
     st.session_state.prestudy = {}
 if "poststudy" not in st.session_state:
     st.session_state.poststudy = {}
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow()
+if "usage_ledger" not in st.session_state:
+    st.session_state.usage_ledger = UsageLedger()
 
 # --- HEADER ---
 st.title("💬 User Study")
@@ -106,7 +112,7 @@ def unanswered_fields(data_dict):
 if st.session_state.show_prestudy:
     st.subheader("🧠 Pre-Study Questions")
     st.markdown("Please answer **all questions** before continuing.")
-    with st.container():
+    with st.form("prestudy_form", enter_to_submit=False):
         st.markdown('<div class="survey-box">', unsafe_allow_html=True)
 
         # --- Section 1 ---
@@ -150,15 +156,10 @@ if st.session_state.show_prestudy:
 
         st.session_state.prestudy["ai_use_case"] = selected_ai_use
 
-        # Show "Other" text input if selected
-        if "Other (please specify)" in selected_ai_use:
-            st.session_state.prestudy["other_use_case"] = st.text_input("Please specify:")
-        else:
-            st.session_state.prestudy["other_use_case"] = ""
-
-
-        if st.session_state.prestudy.get("ai_use_case") == "Other (please specify)":
-            st.session_state.prestudy["other_use_case"] = st.text_input("Please specify:")
+        # Inside the form this field cannot appear when "Other" is ticked, so it is
+        # always shown and only kept (and required) when "Other" is selected
+        other_use_case = st.text_input('If you selected "Other", please specify:', key="other_use_case")
+        st.session_state.prestudy["other_use_case"] = other_use_case if "Other (please specify)" in selected_ai_use else ""
 
         # --- Section 2 ---
         st.markdown("#### ✍️ Writing Habits and Confidence")
@@ -199,8 +200,12 @@ if st.session_state.show_prestudy:
             default=[],
         )
 
+        # Always shown inside the form; only kept (and required) when "Other" is selected
+        llm_use_purpose_other = st.text_input('If you selected "Other", please specify:', key="llm_use_purpose_other")
         if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
-            st.session_state.prestudy["llm_use_purpose_other"] = st.text_input("Please specify:")
+            st.session_state.prestudy["llm_use_purpose_other"] = llm_use_purpose_other
+        else:
+            st.session_state.prestudy.pop("llm_use_purpose_other", None)
 
         st.session_state.prestudy["llm_last_experience"] = st.text_area(
             "Please describe the last time you used a large language model (LLM) such as ChatGPT, Claude, Gemini, or another AI assistant. "
@@ -210,7 +215,9 @@ if st.session_state.show_prestudy:
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-    if st.button("Start Chat"):
+        submitted = st.form_submit_button("Start Chat")
+
+    if submitted:
         missing = unanswered_fields(st.session_state.prestudy)
         if missing:
             st.markdown('<p class="missing">⚠️ Please answer all questions before continuing.</p>', unsafe_allow_html=True)
@@ -220,7 +227,7 @@ if st.session_state.show_prestudy:
 
 # --- CHAT ---
 elif not st.session_state.show_survey:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = get_backend("openai")
     st.subheader("💬 Chat with the LLM")
 
     for msg in st.session_state.messages:
@@ -232,20 +239,30 @@ elif not st.session_state.show_survey:
         with st.chat_message("user"):
             st.markdown(prompt)
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You are a friendly and helpful assistant."},
-                            *st.session_state.messages,
-                        ],
-                    )
-                    answer = response.choices[0].message.content
-                except Exception as e:
-                    answer = f"⚠️ Error: {e}"
-                st.markdown(answer)
-                st.session_state.messages.append({"role": "assistant", "content": answer})
+            scheduler = get_scheduler()
+            context = st.session_state.context_window.build(st.session_state.messages)
+            reply = ChatStream(
+                client,
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are a friendly and helpful assistant."},
+                    *context,
+                ],
+                scheduler=scheduler,
+                breaker=get_circuit_breaker(client, "gpt-4o-mini"),
+                on_wait=lambda position: status.caption(f"⏳ The assistant is busy, you are #{position} in line..."),
+            )
+            status = st.empty()
+            st.write_stream(reply)
+            status.empty()
+            usage = st.session_state.usage_ledger.record(reply)
+            st.session_state.messages.append(reply.as_message(usage))
+            # The reply is already on screen; fold older turns into the summary for the next one
+            summary = st.session_state.context_window.fold(
+                client, st.session_state.messages, scheduler=scheduler, model="gpt-4o-mini"
+            )
+            if summary is not None:
+                st.session_state.usage_ledger.record(summary)
 
     if st.button("✅ Done"):
         st.session_state.show_survey = True
@@ -258,51 +275,54 @@ if st.session_state.show_survey:
 
     likert_post = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-    st.markdown("#### 📊 LLM Involvement")
-    st.session_state.poststudy["percent_llm_generated"] = st.radio(
-        "What percentage of the document would you say was LLM-generated?",
-        ["0%", "20%", "40%", "60%", "80%", "100%"],
-        index=None,
-        horizontal=True,
-    )
-
-    st.markdown("#### 💡 Reflections on LLM Use")
-    questions = {
-        "idea_generation": "The LLM helped me generate ideas more effectively.",
-        "feedback_quality": "The model’s feedback improved the quality of my essay.",
-        "irrelevant_suggestions": "The LLM’s suggestions were irrelevant to my goals.",
-        "learned_about_writing": "I learned something new about writing from using the LLM.",
-        "lost_control": "I felt I had less control of the essay writing process when working with the LLM.",
-        "too_much_initiative": "The model took too much initiative in generating content.",
-        "collaboration": "I felt that the LLM and I were collaborating as partners.",
-        "matched_assistance": "The model’s behavior matched my preferred level of assistance.",
-        "distrust_suggestions": "I did not trust the LLM’s writing suggestions.",
-        "would_not_use_again": "I would not use this LLM again for a similar writing task.",
-        "question_originality": "Using the LLM made me question what counts as original writing.",
-        "would_disclose": "I would disclose AI assistance if submitting this essay academically.",
-    }
-    for key, q in questions.items():
-        st.session_state.poststudy[key] = st.radio(q, likert_post, index=None, horizontal=True)
-
-    st.markdown("#### 🪶 Reflections on Your Essay")
-    st.session_state.poststudy["satisfied_with_essay"] = st.radio("I was satisfied with the essay.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["creativity_level"] = st.radio(
-        "How creative do you feel you were in writing the essay?",
-        ["Very creative", "Somewhat creative", "Neither creative nor uncreative", "Somewhat uncreative", "Not at all creative"],
-        index=None
-    )
-    st.session_state.poststudy["essay_in_my_voice"] = st.radio("I felt the essay was written in my voice.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["difficult_to_organize"] = st.radio("I found it difficult to organize my thoughts while writing.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["writing_struggle"] = st.radio("Writing this essay was a struggle for me.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["essay_experience"] = st.text_area(
-        "Please describe your experience writing this essay.\n"
-        "Comment on: How well does the essay reflect your own views and writing style? "
-        "How much effort did you put into writing it? Did you learn anything during the process?"
-    )
-
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    if st.button("Submit Feedback"):
+    with st.form("poststudy_form", enter_to_submit=False):
+        st.markdown("#### 📊 LLM Involvement")
+        st.session_state.poststudy["percent_llm_generated"] = st.radio(
+            "What percentage of the document would you say was LLM-generated?",
+            ["0%", "20%", "40%", "60%", "80%", "100%"],
+            index=None,
+            horizontal=True,
+        )
+
+        st.markdown("#### 💡 Reflections on LLM Use")
+        questions = {
+            "idea_generation": "The LLM helped me generate ideas more effectively.",
+            "feedback_quality": "The model’s feedback improved the quality of my essay.",
+            "irrelevant_suggestions": "The LLM’s suggestions were irrelevant to my goals.",
+            "learned_about_writing": "I learned something new about writing from using the LLM.",
+            "lost_control": "I felt I had less control of the essay writing process when working with the LLM.",
+            "too_much_initiative": "The model took too much initiative in generating content.",
+            "collaboration": "I felt that the LLM and I were collaborating as partners.",
+            "matched_assistance": "The model’s behavior matched my preferred level of assistance.",
+            "distrust_suggestions": "I did not trust the LLM’s writing suggestions.",
+            "would_not_use_again": "I would not use this LLM again for a similar writing task.",
+            "question_originality": "Using the LLM made me question what counts as original writing.",
+            "would_disclose": "I would disclose AI assistance if submitting this essay academically.",
+        }
+        for key, q in questions.items():
+            st.session_state.poststudy[key] = st.radio(q, likert_post, index=None, horizontal=True)
+
+        st.markdown("#### 🪶 Reflections on Your Essay")
+        st.session_state.poststudy["satisfied_with_essay"] = st.radio("I was satisfied with the essay.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["creativity_level"] = st.radio(
+            "How creative do you feel you were in writing the essay?",
+            ["Very creative", "Somewhat creative", "Neither creative nor uncreative", "Somewhat uncreative", "Not at all creative"],
+            index=None
+        )
+        st.session_state.poststudy["essay_in_my_voice"] = st.radio("I felt the essay was written in my voice.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["difficult_to_organize"] = st.radio("I found it difficult to organize my thoughts while writing.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["writing_struggle"] = st.radio("Writing this essay was a struggle for me.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["essay_experience"] = st.text_area(
+            "Please describe your experience writing this essay.\n"
+            "Comment on: How well does the essay reflect your own views and writing style? "
+            "How much effort did you put into writing it? Did you learn anything during the process?"
+        )
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        submitted = st.form_submit_button("Submit Feedback")
+
+    if submitted:
         missing = unanswered_fields(st.session_state.poststudy)
         print(missing)
         if missing:
@@ -325,6 +345,7 @@ if st.session_state.show_survey:
                 "timestamp": datetime.now().isoformat(),
                 "prestudy": st.session_state.prestudy,
                 "conversation": st.session_state.messages,
+                "usage": st.session_state.usage_ledger.summary(),
                 "poststudy": st.session_state.poststudy,
             })
 
@@ -332,5 +353,6 @@ if st.session_state.show_survey:
             st.session_state.show_survey = False
             st.session_state.show_prestudy = True
             st.session_state.messages = []
+            st.session_state.usage_ledger = UsageLedger()
             st.session_state.prestudy = {}
             st.session_state.poststudy = {}
@@ -1,12 +1,18 @@
 import streamlit as st
-from openai import OpenAI
 import os
 import json
+import math
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore
 import streamlit as st
 from streamlit_js_eval import streamlit_js_eval
+from llm_chat import (
+    MODERATION_NOTICE, PANEL_LABELS, POLL_INTERVAL, ChatStream, ContextWindow, EssayTracker, FanOut,
+    SessionRateLimit, UsageLedger, count_message_tokens, get_backend, get_circuit_breaker,
+    get_load_controller, get_response_cache, get_scheduler, get_shadow_mirror, get_worker_pool, grammar_reply,
+    model_view, response_cache_enabled, start_moderation, study_system_prompt, submit_turn, turn_key,
+)
 
 # Initialize Firebase once
 firebase_config = dict(st.secrets["FIREBASE"])
@@ -96,6 +102,8 @@ if "essay_box" not in st.session_state:
     st.session_state.essay_box = ""
 if "do_scroll_top" not in st.session_state:
     st.session_state.do_scroll_top = False
+if "turn" not in st.session_state:
+    st.session_state.turn = None
 
 # --- HEADER ---
 st.title("💬 User Study")
@@ -127,38 +135,308 @@ def scroll_to_top():
         unsafe_allow_html=True,
     )
 
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-)
+# Shared by every session in this process. OpenRouter by default; LLM_BACKEND=mock
+# or fake runs the chat offline (see llm_chat/mock_server.py and llm_chat/fake.py)
+client = get_backend()
+
+MODEL = "openai/gpt-5.2"
+ESSAY_PROMPT = "Is it better to work on a team or alone?"
+# Stable prefix shared by every participant of this variant (prompt-cache friendly)
+SYSTEM_PROMPT = study_system_prompt(ESSAY_PROMPT)
+# Render the reply token by token instead of waiting for the full completion
+STREAM_REPLIES = True
+
+# Under load (queue backing up or slow p95), new requests step down to a faster
+# tier and back up once latency recovers. Preferred tier first.
+FAST_MODEL = "openai/gpt-4o-mini"
+MODEL_TIERS = [
+    {"model": MODEL},
+    {"model": FAST_MODEL, "max_tokens": 600},
+]
+
+# Hedging: if no token arrives within HEDGE_AFTER seconds, send a duplicate
+# request on this route (model + extra parameters) and keep the faster one
+HEDGE_ROUTE = None  # e.g. {"model": MODEL, "extra_body": {"provider": {"order": ["azure"]}}}
+HEDGE_AFTER = 6.0
+
+# Shadow traffic: mirror a sample of chat requests to a candidate model, off the
+# request path, and store its answers in a separate collection for comparison
+SHADOW_MODEL = None  # e.g. "openai/gpt-5.2"
+SHADOW_SAMPLE_RATE = 0.1
+
+# Fan-out condition: send each message to all of these models at once and show
+# the replies side by side ("side_by_side") or only the fastest one ("fastest")
+FANOUT_MODELS = []  # e.g. [MODEL, "anthropic/claude-sonnet-4.5"]
+FANOUT_DISPLAY = "side_by_side"
+
+# Safety screening of participant messages, run alongside the completion: "local"
+# (keyword stand-in), "openai" (hosted moderation endpoint) or None. The reply is
+# held until the verdict arrives and replaced with a notice if the message is flagged.
+MODERATION = None
+
+# Opt-in condition: "check my grammar: <paragraph>" requests are answered by a
+# local rule-based checker in milliseconds; everything else goes to the model.
+# Every assistant message records the path that produced it under "path".
+GRAMMAR_FAST_PATH = False
+
+# Internal pilots only: near-identical repeat questions are answered from a
+# process-wide cache. Enabled per deployment with LLM_RESPONSE_CACHE=1 and
+# always off for sessions that arrive with a PROLIFIC_PID.
+response_cache = get_response_cache() if response_cache_enabled(st.session_state.get("prolific_pid")) else None
+
+# Per-participant send limits for this study variant
+RATE_LIMIT = {"messages_per_minute": 6, "burst": 3, "tokens_per_minute": 60000}
+
+# Opt-in: attach the essay paragraphs the model has not seen yet to each message
+SHARE_ESSAY = False
+
+# Recent turns verbatim, older ones as a running summary
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow()
+# Fan-out models each see their own replies, so each summarizes its own side.
+# The first model's window is the session's, which the rate limit and essay tracker read.
+if "fanout_windows" not in st.session_state:
+    st.session_state.fanout_windows = [st.session_state.context_window, *(ContextWindow() for _ in FANOUT_MODELS[1:])]
+if "essay_tracker" not in st.session_state:
+    st.session_state.essay_tracker = EssayTracker()
+# Token, latency and cost totals, stored next to the conversation
+if "usage_ledger" not in st.session_state:
+    st.session_state.usage_ledger = UsageLedger()
+if "rate_limit" not in st.session_state:
+    st.session_state.rate_limit = SessionRateLimit(**RATE_LIMIT)
+if "chat_notice" not in st.session_state:
+    st.session_state.chat_notice = ""
+
+def cancel_turn(reason):
+    # Stops the pending reply (freeing its slot) and records it as cancelled
+    turn = st.session_state.turn
+    if turn is None:
+        return
+    turn.cancel(reason)
+    st.session_state.messages.append(turn.cancelled_message())
+    st.session_state.turn = None
 
 def send_message():
     user_text = st.session_state["chat_input"]
     if not user_text.strip():
         return
 
-    # Add user message
-    st.session_state.messages.append({"role": "user", "content": user_text})
+    # Enter followed by Send can submit the same text twice; the repeat attaches
+    # to the reply already in flight instead of starting a second one
+    turn = st.session_state.turn
+    if turn is not None and turn.key == turn_key(len(st.session_state.messages) - 1, user_text):
+        st.session_state.chat_input = ""
+        return
 
-    # OpenAI call
-    try:
-        response = client.chat.completions.create(
-            model="openai/gpt-5.2",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                *st.session_state.messages,
-            ],
+    # Cooldown: keep the text in the box and tell the participant how long to wait
+    window = st.session_state.messages[st.session_state.context_window.folded:]
+    prompt_tokens = count_message_tokens([*window, {"content": user_text}])
+    wait = st.session_state.rate_limit.check(prompt_tokens)
+    if wait:
+        st.session_state.chat_notice = f"⏳ Please wait {math.ceil(wait)} seconds before sending another message."
+        return
+
+    # A newer message supersedes a reply that is still being generated
+    cancel_turn("superseded")
+
+    # Add user message
+    message = {"role": "user", "content": user_text}
+    if SHARE_ESSAY:
+        essay_context = st.session_state.essay_tracker.context_for(
+            st.session_state.essay_box,
+            len(st.session_state.messages),
+            visible_from=st.session_state.context_window.folded,
         )
-        assistant_reply = response.choices[0].message.content
-    except Exception as e:
-        assistant_reply = f"⚠️ API Error: {e}"
+        if essay_context:
+            message["essay_context"] = essay_context
+    st.session_state.messages.append(message)
+
+    reply = grammar_reply(user_text) if GRAMMAR_FAST_PATH else None
+    if reply is not None:
+        st.session_state.messages.append(reply)
+        st.session_state.chat_input = ""
+        return
+
+    hit = response_cache.get(MODEL, st.session_state.messages) if response_cache else None
+    if hit is not None:
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": hit["content"],
+            "path": "cache",
+            "cache": {"similarity": hit["similarity"], "age": hit["age"]},
+        })
+        st.session_state.chat_input = ""
+        return
 
-    # Add assistant response
-    st.session_state.messages.append({"role": "assistant", "content": assistant_reply})
+    # The reply is generated on the worker pool; the chat fragment polls for it
+    start_reply(key=turn_key(len(st.session_state.messages) - 1, user_text))
 
     # Clear input field
     st.session_state.chat_input = ""
 
+def save_shadow(record):
+    db.collection("llm_shadow_responses").add(record)
+
+def start_reply(key=None):
+    # Everything from st.session_state and the resource caches is resolved here,
+    # on the script thread; the worker only gets plain objects
+    scheduler = get_scheduler()
+    controller = get_load_controller(MODEL_TIERS, scheduler)
+    models = {tier["model"] for tier in MODEL_TIERS} | set(FANOUT_MODELS)
+    breakers = {model: get_circuit_breaker(client, model) for model in models}
+    context_window = st.session_state.context_window
+    fanout_windows = st.session_state.fanout_windows
+    usage_ledger = st.session_state.usage_ledger
+    pool = get_worker_pool()
+    history = list(st.session_state.messages)
+    moderation = start_moderation(MODERATION, history[-1]["content"]) if MODERATION else None
+    shadow = get_shadow_mirror(client, SHADOW_MODEL, SHADOW_SAMPLE_RATE, save_shadow, scheduler) if SHADOW_MODEL else None
+    shadow_labels = {
+        "prolific_pid": st.session_state.get("prolific_pid"),
+        "study_id": st.session_state.get("study_id"),
+        "turn": len(history),
+    }
+
+    def generate_fanout(turn):
+        if turn.cancel_reason:
+            return turn.cancelled_message()
+        # Each model continues its own side of the conversation
+        streams = [
+            ChatStream(
+                client,
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    *fanout_windows[i].build(model_view(history, i)),
+                ],
+                stream=STREAM_REPLIES,
+                breaker=breakers[model],
+                scheduler=scheduler,
+                on_wait=turn.set_position,
+            )
+            for i, model in enumerate(FANOUT_MODELS)
+        ]
+        # Every panel waits for the moderation verdict, like a single reply
+        fanout = FanOut(streams, display=FANOUT_DISPLAY, shown=turn.parts, screen=moderation.screen if moderation else None)
+        if FANOUT_DISPLAY == "side_by_side":
+            turn.panels = fanout.parts
+        for stream in streams:
+            turn.attach(stream)
+        fanout.run()
+        # Per-model timing and usage for this turn, under "responses"
+        message = fanout.as_message([usage_ledger.record(stream) for stream in streams])
+        message["path"] = "llm"
+        if moderation is not None:
+            message["moderation"] = moderation.verdict()
+            if message["moderation"]["flagged"]:
+                message["content"] = MODERATION_NOTICE
+                for response in message["responses"]:
+                    response["content"] = MODERATION_NOTICE
+                    response.pop("cancelled", None)
+        return message
+
+    def generate(turn):
+        if FANOUT_MODELS:
+            return generate_fanout(turn)
+        # Superseded or disconnected while waiting for a worker
+        if turn.cancel_reason:
+            return turn.cancelled_message()
+        context = context_window.build(history)
+        load = controller.decide()
+        reply = ChatStream(
+            client,
+            model=load["model"],
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                *context,
+            ],
+            stream=STREAM_REPLIES,
+            hedge_route=HEDGE_ROUTE,
+            hedge_after=HEDGE_AFTER,
+            # Fails fast with a friendly message while the backend is down
+            breaker=breakers[load["model"]],
+            **({"max_tokens": load["max_tokens"]} if load["max_tokens"] else {}),
+            # All sessions share one queue, so a batch launch cannot trip the rate limits
+            scheduler=scheduler,
+            on_wait=turn.set_position,
+        )
+        turn.attach(reply)
+        for delta in moderation.screen(reply) if moderation else reply:
+            turn.parts.append(delta)
+
+        # A cancelled reply's latency is cut short, so it says nothing about load
+        if not reply.cancel_reason:
+            controller.observe(reply)
+
+        # Assistant response, with the load decision so analysis can control for downgrades.
+        # Cancelled replies are still billed for what they used.
+        usage = usage_ledger.record(reply)
+        message = reply.as_message(usage)
+        message["load_control"] = load
+        message["path"] = "llm"
+        if moderation is not None:
+            message["moderation"] = moderation.verdict()
+            if message["moderation"]["flagged"]:
+                message["content"] = MODERATION_NOTICE
+                message.pop("cancelled", None)
+        if shadow is not None and not reply.error and not reply.cancel_reason:
+            shadow.maybe_mirror(reply.messages, message, shadow_labels)
+        # Only full-quality replies are reused
+        if response_cache is not None and not reply.error and not reply.cancel_reason and load["tier"] == 0:
+            response_cache.put(MODEL, history, reply.text)
+        return message
+
+    def fold_context(messages):
+        # Summaries are written after the reply, so the next turn finds them ready
+        windows = fanout_windows if FANOUT_MODELS else [context_window]
+        for i, window in enumerate(windows):
+            summary = window.fold(client, model_view(messages, i), scheduler=scheduler)
+            if summary is not None:
+                usage_ledger.record(summary)
+
+    def generate_and_fold(turn):
+        message = generate(turn)
+        if not turn.cancel_reason:
+            pool.submit(fold_context, [*history, message])
+        return message
+
+    st.session_state.turn = submit_turn(generate_and_fold, key=key)
+
+def show_panels(texts):
+    for label, column, text in zip(PANEL_LABELS, st.columns(len(texts)), texts):
+        with column:
+            st.caption(f"Assistant {label}")
+            st.markdown(text)
+
+@st.fragment(run_every=POLL_INTERVAL if st.session_state.turn is not None else None)
+def chat_history():
+    for msg in st.session_state.messages:
+        with st.chat_message(msg["role"]):
+            if msg.get("fanout") == "side_by_side":
+                show_panels([r["content"] for r in msg["responses"]])
+            else:
+                st.markdown(msg["content"])
+            if msg.get("cancelled"):
+                st.caption("Reply cancelled")
+
+    turn = st.session_state.turn
+    if turn is None:
+        return
+    if turn.done():
+        st.session_state.messages.append(turn.result())
+        st.session_state.turn = None
+        # Full rerun to render the reply and switch polling off
+        st.rerun()
+    with st.chat_message("assistant"):
+        if turn.panels is not None and any(turn.panels):
+            show_panels(["".join(parts) + " ▌" for parts in turn.panels])
+        elif turn.parts:
+            st.markdown(turn.text + " ▌")
+        elif turn.position:
+            st.caption(f"⏳ The assistant is busy, you are #{turn.position} in line...")
+        else:
+            st.caption("Thinking...")
+
 if st.session_state.show_consent:
     st.title("📝 Consent Form")
 
@@ -222,7 +500,7 @@ if st.session_state.do_scroll_top:
 if st.session_state.show_prestudy:
     st.subheader("🧠 Part I: Pre-Study Questions")
     st.markdown("Please answer **all questions** before continuing.")
-    with st.container():
+    with st.form("prestudy_form", enter_to_submit=False):
         # st.markdown('<div class="survey-box">', unsafe_allow_html=True)
 
         # --- Section 1 ---
@@ -266,15 +544,10 @@ if st.session_state.show_prestudy:
 
         st.session_state.prestudy["ai_use_case"] = selected_ai_use
 
-        # Show "Other" text input if selected
-        if "Other (please specify)" in selected_ai_use:
-            st.session_state.prestudy["other_use_case"] = st.text_input("Please specify:")
-        else:
-            st.session_state.prestudy["other_use_case"] = ""
-
-
-        if st.session_state.prestudy.get("ai_use_case") == "Other (please specify)":
-            st.session_state.prestudy["other_use_case"] = st.text_input("Please specify:")
+        # Inside the form this field cannot appear when "Other" is ticked, so it is
+        # always shown and only kept (and required) when "Other" is selected
+        other_use_case = st.text_input('If you selected "Other", please specify:', key="other_use_case")
+        st.session_state.prestudy["other_use_case"] = other_use_case if "Other (please specify)" in selected_ai_use else ""
 
         # --- Section 2 ---
         st.markdown("#### ✍️ Writing Habits and Confidence")
@@ -315,8 +588,12 @@ if st.session_state.show_prestudy:
             default=[],
         )
 
+        # Always shown inside the form; only kept (and required) when "Other" is selected
+        llm_use_purpose_other = st.text_input('If you selected "Other", please specify:', key="llm_use_purpose_other")
         if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
-            st.session_state.prestudy["llm_use_purpose_other"] = st.text_input("Please specify:")
+            st.session_state.prestudy["llm_use_purpose_other"] = llm_use_purpose_other
+        else:
+            st.session_state.prestudy.pop("llm_use_purpose_other", None)
 
         st.session_state.prestudy["llm_last_experience"] = st.text_area(
             "Please describe the last time you used a large language model (LLM) such as ChatGPT, Claude, Gemini, or another AI assistant. "
@@ -326,7 +603,9 @@ if st.session_state.show_prestudy:
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-    if st.button("Start Chat"):
+        submitted = st.form_submit_button("Start Chat")
+
+    if submitted:
         missing = unanswered_fields(st.session_state.prestudy)
         st.session_state.do_scroll_top = True
         if missing:
@@ -359,8 +638,8 @@ elif not st.session_state.show_survey:
     **You have a maximum of one hour** to complete the study.
     """)
 
-    st.markdown("""
-        **Essay Prompt**: Is it better to work on a team or alone?
+    st.markdown(f"""
+        **Essay Prompt**: {ESSAY_PROMPT}
             
         Write your response to this essay which must be 300-500 words in the text box on the left while you chat with the LLM on the right.
         
@@ -395,9 +674,8 @@ elif not st.session_state.show_survey:
         # Chat history
         chat_container = st.container()
         with chat_container:
-            for msg in st.session_state.messages:
-                with st.chat_message(msg["role"]):
-                    st.markdown(msg["content"])
+            # Re-renders on its own while a reply is pending, so the essay box stays responsive
+            chat_history()
 
         # INPUT + BUTTON, both inside the right column
         st.text_input(
@@ -408,9 +686,14 @@ elif not st.session_state.show_survey:
 
         st.button("Send", on_click=send_message, use_container_width=True)
 
+        if st.session_state.chat_notice:
+            st.warning(st.session_state.chat_notice)
+            st.session_state.chat_notice = ""
+
 
 
     if st.button("✅ Done"):
+        cancel_turn("phase_change")
         st.session_state.do_scroll_top = True
         missing = st.session_state.essay_box == ""
         if missing:
@@ -427,51 +710,54 @@ if st.session_state.show_survey:
 
     likert_post = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-    st.markdown("#### 📊 LLM Involvement")
-    st.session_state.poststudy["percent_llm_generated"] = st.radio(
-        "What percentage of the document would you say was LLM-generated?",
-        ["0%", "20%", "40%", "60%", "80%", "100%"],
-        index=None,
-        horizontal=True,
-    )
+    with st.form("poststudy_form", enter_to_submit=False):
+        st.markdown("#### 📊 LLM Involvement")
+        st.session_state.poststudy["percent_llm_generated"] = st.radio(
+            "What percentage of the document would you say was LLM-generated?",
+            ["0%", "20%", "40%", "60%", "80%", "100%"],
+            index=None,
+            horizontal=True,
+        )
 
-    st.markdown("#### 💡 Reflections on LLM Use")
-    questions = {
-        "idea_generation": "The LLM helped me generate ideas more effectively.",
-        "feedback_quality": "The model’s feedback improved the quality of my essay.",
-        "irrelevant_suggestions": "The LLM’s suggestions were irrelevant to my goals.",
-        "learned_about_writing": "I learned something new about writing from using the LLM.",
-        "lost_control": "I felt I had less control of the essay writing process when working with the LLM.",
-        "too_much_initiative": "The model took too much initiative in generating content.",
-        "collaboration": "I felt that the LLM and I were collaborating as partners.",
-        "matched_assistance": "The model’s behavior matched my preferred level of assistance.",
-        "distrust_suggestions": "I did not trust the LLM’s writing suggestions.",
-        "would_not_use_again": "I would not use this LLM again for a similar writing task.",
-        "question_originality": "Using the LLM made me question what counts as original writing.",
-        "would_disclose": "I would disclose AI assistance if submitting this essay academically.",
-    }
-    for key, q in questions.items():
-        st.session_state.poststudy[key] = st.radio(q, likert_post, index=None, horizontal=True)
-
-    st.markdown("#### 🪶 Reflections on Your Essay")
-    st.session_state.poststudy["satisfied_with_essay"] = st.radio("I was satisfied with the essay.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["creativity_level"] = st.radio(
-        "How creative do you feel you were in writing the essay?",
-        ["Very creative", "Somewhat creative", "Neither creative nor uncreative", "Somewhat uncreative", "Not at all creative"],
-        index=None
-    )
-    st.session_state.poststudy["essay_in_my_voice"] = st.radio("I felt the essay was written in my voice.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["difficult_to_organize"] = st.radio("I found it difficult to organize my thoughts while writing.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["writing_struggle"] = st.radio("Writing this essay was a struggle for me.", likert_post, index=None, horizontal=True)
-    st.session_state.poststudy["essay_experience"] = st.text_area(
-        "Please describe your experience writing this essay.\n"
-        "Comment on: How well does the essay reflect your own views and writing style? "
-        "How much effort did you put into writing it? Did you learn anything during the process?"
-    )
+        st.markdown("#### 💡 Reflections on LLM Use")
+        questions = {
+            "idea_generation": "The LLM helped me generate ideas more effectively.",
+            "feedback_quality": "The model’s feedback improved the quality of my essay.",
+            "irrelevant_suggestions": "The LLM’s suggestions were irrelevant to my goals.",
+            "learned_about_writing": "I learned something new about writing from using the LLM.",
+            "lost_control": "I felt I had less control of the essay writing process when working with the LLM.",
+            "too_much_initiative": "The model took too much initiative in generating content.",
+            "collaboration": "I felt that the LLM and I were collaborating as partners.",
+            "matched_assistance": "The model’s behavior matched my preferred level of assistance.",
+            "distrust_suggestions": "I did not trust the LLM’s writing suggestions.",
+            "would_not_use_again": "I would not use this LLM again for a similar writing task.",
+            "question_originality": "Using the LLM made me question what counts as original writing.",
+            "would_disclose": "I would disclose AI assistance if submitting this essay academically.",
+        }
+        for key, q in questions.items():
+            st.session_state.poststudy[key] = st.radio(q, likert_post, index=None, horizontal=True)
+
+        st.markdown("#### 🪶 Reflections on Your Essay")
+        st.session_state.poststudy["satisfied_with_essay"] = st.radio("I was satisfied with the essay.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["creativity_level"] = st.radio(
+            "How creative do you feel you were in writing the essay?",
+            ["Very creative", "Somewhat creative", "Neither creative nor uncreative", "Somewhat uncreative", "Not at all creative"],
+            index=None
+        )
+        st.session_state.poststudy["essay_in_my_voice"] = st.radio("I felt the essay was written in my voice.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["difficult_to_organize"] = st.radio("I found it difficult to organize my thoughts while writing.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["writing_struggle"] = st.radio("Writing this essay was a struggle for me.", likert_post, index=None, horizontal=True)
+        st.session_state.poststudy["essay_experience"] = st.text_area(
+            "Please describe your experience writing this essay.\n"
+            "Comment on: How well does the essay reflect your own views and writing style? "
+            "How much effort did you put into writing it? Did you learn anything during the process?"
+        )
+
+        st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
+        submitted = st.form_submit_button("Submit Feedback")
 
-    if st.button("Submit Feedback"):
+    if submitted:
         missing = unanswered_fields(st.session_state.poststudy)
         print(missing)
         if missing:
@@ -494,6 +780,7 @@ if st.session_state.show_survey:
                 "timestamp": datetime.now().isoformat(),
                 "prestudy": st.session_state.prestudy,
                 "conversation": st.session_state.messages,
+                "usage": st.session_state.usage_ledger.summary(),
                 "poststudy": st.session_state.poststudy,
                 "essay_text": st.session_state.essay, 
                 'prolific_pid': st.session_state.prolific_pid,
@@ -505,6 +792,7 @@ if st.session_state.show_survey:
             st.session_state.show_survey = False
             st.session_state.show_prestudy = True
             st.session_state.messages = []
+            st.session_state.usage_ledger = UsageLedger()
             st.session_state.prestudy = {}
             st.session_state.poststudy = {}
 
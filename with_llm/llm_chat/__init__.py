@@ -0,0 +1,16 @@
+from .streaming import ChatStream, api_messages, usage_record
+from .client import get_backend, get_circuit_breaker, get_client, pool_stats
+from .scheduler import LLMScheduler, SessionRateLimit, get_scheduler
+from .context import ContextWindow, EssayTracker, study_system_prompt
+from .accounting import UsageLedger, count_message_tokens, count_tokens
+from .resilience import CircuitBreaker, CircuitOpenError, HedgedStream, RetryPolicy
+from .load_control import LoadController, get_load_controller
+from .workers import POLL_INTERVAL, ChatTurn, get_worker_pool, submit_turn, turn_key
+from .fake import FakeClient, FakeModel
+from .cassettes import RecordingClient, ReplayClient
+from .shadow import ShadowMirror, get_shadow_mirror
+from .fanout import PANEL_LABELS, FanOut, model_view
+from .moderation import MODERATION_NOTICE, LocalModerator, ModerationCheck, OpenAIModerator, start_moderation
+from .grammar import grammar_reply, is_grammar_request
+from .response_cache import ResponseCache, get_response_cache, response_cache_enabled
+from .telemetry import Histogram, Telemetry, metrics_snapshot, telemetry
@@ -0,0 +1,106 @@
+import threading
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # fall back to the ~4 characters per token rule of thumb
+    tiktoken = None
+
+# USD per 1M tokens: (input, cached input, output). Update when provider pricing changes.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "openai/gpt-4o-mini": (0.15, 0.075, 0.60),
+    "openai/gpt-5.2": (1.75, 0.175, 14.00),
+}
+
+# Per-message framing overhead of the chat format
+TOKENS_PER_MESSAGE = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("o200k_base") if tiktoken else None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text):
+    # Cached per string, so history messages are tokenized once, not on every turn
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages):
+    return sum(count_tokens(m["content"]) + TOKENS_PER_MESSAGE for m in messages)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_prompt_tokens=0):
+    if model not in PRICES:
+        return None
+    input_price, cached_price, output_price = PRICES[model]
+    return (
+        (prompt_tokens - cached_prompt_tokens) * input_price
+        + cached_prompt_tokens * cached_price
+        + completion_tokens * output_price
+    ) / 1_000_000
+
+
+class UsageLedger:
+    """Running token, latency and cost totals for one participant session.
+
+    Context summaries are recorded from a background worker, so ``record``
+    takes a lock.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = 0.0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, reply):
+        """Add one finished ChatStream and return its per-message usage record."""
+        if reply.usage is not None:
+            details = getattr(reply.usage, "prompt_tokens_details", None)
+            usage = {
+                "source": "api",
+                "prompt_tokens": reply.usage.prompt_tokens,
+                "cached_prompt_tokens": getattr(details, "cached_tokens", None) or 0,
+                "completion_tokens": reply.usage.completion_tokens,
+            }
+        else:
+            # Provider did not report usage (error, or no usage chunk): count locally
+            usage = {
+                "source": "local",
+                "prompt_tokens": count_message_tokens(reply.messages),
+                "cached_prompt_tokens": 0,
+                "completion_tokens": count_tokens(reply.text),
+            }
+        usage["uncached_prompt_tokens"] = usage["prompt_tokens"] - usage["cached_prompt_tokens"]
+        cost = estimate_cost(
+            reply.model_used, usage["prompt_tokens"], usage["completion_tokens"], usage["cached_prompt_tokens"]
+        )
+        usage["cost"] = round(cost, 6) if cost is not None else None
+
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.cached_prompt_tokens += usage["cached_prompt_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+            self.latency += reply.latency or 0.0
+            self.cost += cost or 0.0
+        return usage
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_latency": round(self.latency, 3),
+            "estimated_cost_usd": round(self.cost, 6),
+        }
@@ -0,0 +1,142 @@
+"""Generate model-written baseline essays for the study prompts.
+
+    python -m llm_chat.baselines --samples 100 --out baselines.parquet
+
+Uses the same backend as the app (``LLM_BACKEND``, API keys, ``LLM_RECORD``)
+and the same process-wide scheduler limits (``LLM_MAX_IN_FLIGHT``,
+``LLM_REQUESTS_PER_MINUTE``, ``LLM_TOKENS_PER_MINUTE``). Every finished essay
+is appended to a JSONL checkpoint next to the output, so an interrupted run
+picks up where it stopped; the Parquet file is rewritten from the checkpoint
+at the end.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .accounting import UsageLedger
+from .client import get_backend
+from .scheduler import LLMScheduler
+from .streaming import ChatStream
+
+PROMPTS = ["Does money lead to happiness?", "Is it ever justified to break the law?"]
+MODELS = ["openai/gpt-4o-mini", "openai/gpt-5.2"]
+
+# Same task the participants get
+ESSAY_INSTRUCTIONS = (
+    "Write an essay of 300-500 words responding to the prompt below. "
+    "Reply with the essay only.\n\nEssay prompt: {prompt}"
+)
+
+SCHEMA = pa.schema([
+    ("prompt", pa.string()),
+    ("model", pa.string()),
+    ("sample", pa.int32()),
+    ("essay", pa.string()),
+    ("words", pa.int32()),
+    ("model_used", pa.string()),
+    ("prompt_tokens", pa.int32()),
+    ("completion_tokens", pa.int32()),
+    ("queue_wait", pa.float32()),
+    ("ttft", pa.float32()),
+    ("latency", pa.float32()),
+    ("tokens_per_second", pa.float32()),
+    ("error", pa.string()),
+    ("created_at", pa.string()),
+])
+
+
+def job_key(row):
+    return (row["prompt"], row["model"], row["sample"])
+
+
+def load_checkpoint(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                if not row["error"]:
+                    done[job_key(row)] = row
+    return done
+
+
+def generate_essay(client, scheduler, prompt, model, sample, **params):
+    messages = [{"role": "user", "content": ESSAY_INSTRUCTIONS.format(prompt=prompt)}]
+    reply = ChatStream(client, model, messages, scheduler=scheduler, **params)
+    for _ in reply:
+        pass
+    usage = UsageLedger().record(reply)
+    timing = reply.as_message()["timing"]
+    essay = "" if reply.error else reply.text.strip()
+    return {
+        "prompt": prompt,
+        "model": model,
+        "sample": sample,
+        "essay": essay,
+        "words": len(essay.split()),
+        "model_used": reply.model_used,
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        **timing,
+        "error": repr(reply.error) if reply.error else None,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+def run(prompts, models, samples, out, workers, **params):
+    checkpoint = out + ".checkpoint.jsonl"
+    done = load_checkpoint(checkpoint)
+    jobs = [
+        (prompt, model, sample)
+        for prompt in prompts for model in models for sample in range(samples)
+        if (prompt, model, sample) not in done
+    ]
+    print(f"{len(done)} essays already in {checkpoint}, {len(jobs)} to generate")
+
+    client = get_backend()
+    scheduler = LLMScheduler()
+    lock = threading.Lock()
+    failed = 0
+    start = time.perf_counter()
+
+    def work(job):
+        nonlocal failed
+        row = generate_essay(client, scheduler, *job, **params)
+        with lock, open(checkpoint, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+            if row["error"]:
+                failed += 1
+            else:
+                done[job] = row
+            finished = len(done)
+        print(f"[{finished}] {job[1]} #{job[2]} {row['words']} words {row['latency']}s {row['error'] or ''}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(work, jobs))
+
+    rows = sorted(done.values(), key=job_key)
+    pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), out, compression="zstd")
+    print(f"Wrote {len(rows)} essays to {out} in {time.perf_counter() - start:.0f}s ({failed} failed, rerun to retry)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompt", action="append", dest="prompts", help="essay prompt (repeatable)")
+    parser.add_argument("--model", action="append", dest="models", help="model id (repeatable)")
+    parser.add_argument("--samples", type=int, default=100, help="essays per prompt and model")
+    parser.add_argument("--out", default="baselines.parquet")
+    parser.add_argument("--workers", type=int, default=16, help="requests generated at once")
+    parser.add_argument("--temperature", type=float, default=None)
+    args = parser.parse_args()
+    params = {"temperature": args.temperature} if args.temperature is not None else {}
+    run(args.prompts or PROMPTS, args.models or MODELS, args.samples, args.out, args.workers, **params)
@@ -0,0 +1,196 @@
+"""Record LLM traffic to a rotating JSONL log and replay it offline.
+
+Recording (``LLM_RECORD=path``) wraps whichever backend is in use. Each
+request becomes one compact line: a hash of the prompt, its size, the reply
+deltas with their timing, usage and any error. Prompts are not stored. The
+replay backend (``LLM_BACKEND=replay``) answers from those lines with the
+original timing, scaled by ``LLM_REPLAY_TIME_SCALE`` (0 = as fast as possible).
+"""
+import glob
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from logging.handlers import RotatingFileHandler
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from .fake import FakeStream, status_error
+
+MAX_BYTES = 20 * 1024 * 1024
+BACKUP_COUNT = 5
+
+
+def prompt_key(model, messages):
+    payload = json.dumps([model, [[m["role"], m["content"]] for m in messages]], separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _error_record(error):
+    return {"status": getattr(error, "status_code", None), "type": type(error).__name__, "message": str(error)[:200]}
+
+
+class RecordingStream:
+    def __init__(self, response, on_done):
+        self.response = response
+        self.on_done = on_done
+
+    def close(self):
+        self.response.close()
+
+    def __iter__(self):
+        start = last = time.perf_counter()
+        deltas, delays, usage, error = [], [], None, None
+        try:
+            for chunk in self.response:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    now = time.perf_counter()
+                    delays.append(round(now - last, 4))
+                    last = now
+                    deltas.append(chunk.choices[0].delta.content)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.on_done(deltas, delays, usage, error, time.perf_counter() - start)
+
+
+class RecordingClient:
+    """Wraps a chat backend and appends every request/response to a rotating log."""
+
+    def __init__(self, inner, path, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        self.inner = inner
+        self.logger = logging.getLogger(f"llm_chat.cassette.{path}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            self.logger.addHandler(RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        wrapped = RecordingClient.__new__(RecordingClient)
+        wrapped.inner = self.inner.with_options(**options)
+        wrapped.logger = self.logger
+        wrapped.chat = SimpleNamespace(completions=SimpleNamespace(create=wrapped._create))
+        return wrapped
+
+    def _write(self, record):
+        self.logger.info(json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+
+    def _create(self, model, messages, stream=False, **params):
+        record = {
+            "at": round(time.time(), 3),
+            "key": prompt_key(model, messages),
+            "model": model,
+            "messages": len(messages),
+            "prompt_chars": sum(len(m["content"]) for m in messages),
+            "stream": bool(stream),
+            "max_tokens": params.get("max_tokens"),
+        }
+        start = time.perf_counter()
+        try:
+            response = self.inner.chat.completions.create(model=model, messages=messages, stream=stream, **params)
+        except Exception as e:
+            record.update(latency=round(time.perf_counter() - start, 4), error=_error_record(e))
+            self._write(record)
+            raise
+
+        def usage_fields(usage):
+            if usage is None:
+                return None
+            return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+
+        if not stream:
+            content = response.choices[0].message.content or ""
+            record.update(latency=round(time.perf_counter() - start, 4), deltas=[content],
+                          delays=[round(time.perf_counter() - start, 4)], usage=usage_fields(response.usage))
+            self._write(record)
+            return response
+
+        connect = time.perf_counter() - start
+
+        def on_done(deltas, delays, usage, error, elapsed):
+            if delays:
+                delays[0] = round(delays[0] + connect, 4)
+            record.update(latency=round(connect + elapsed, 4), deltas=deltas, delays=delays,
+                          usage=usage_fields(usage), error=_error_record(error) if error else None)
+            self._write(record)
+
+        return RecordingStream(response, on_done)
+
+
+class ReplayClient:
+    """Serves recorded responses: same prompt hash first, otherwise the next recording in order."""
+
+    def __init__(self, pattern, time_scale=1.0):
+        self.time_scale = time_scale
+        self.records = []
+        for path in sorted(glob.glob(pattern), reverse=True):  # oldest rotated file first
+            with open(path) as f:
+                self.records.extend(json.loads(line) for line in f if line.strip())
+        if not self.records:
+            raise ValueError(f"No recorded LLM traffic found in {pattern}")
+        self._by_key = defaultdict(deque)
+        for record in self.records:
+            self._by_key[record["key"]].append(record)
+        self._next = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        return self
+
+    def _pick(self, model, messages):
+        with self._lock:
+            matches = self._by_key.get(prompt_key(model, messages))
+            if matches:
+                record = matches[0]
+                matches.rotate(-1)
+                return record
+            record = self.records[self._next % len(self.records)]
+            self._next += 1
+            return record
+
+    def _create(self, model, messages, stream=False, **params):
+        record = self._pick(model, messages)
+        error = record.get("error")
+        if error and not record.get("deltas"):
+            time.sleep(record.get("latency", 0) * self.time_scale)
+            if error["status"]:
+                raise status_error(error["status"])
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://replay.local"))
+
+        usage = record.get("usage") or {}
+        plan = {
+            "tokens": record["deltas"],
+            "delays": [d * self.time_scale for d in record["delays"]],
+            # A recording that broke mid-stream breaks at the same point on replay
+            "fail_at": len(record["deltas"]) if error else None,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", len(record["deltas"])),
+        }
+        if stream:
+            if plan["fail_at"] is not None:
+                plan["tokens"] = plan["tokens"] + [""]
+                plan["delays"] = plan["delays"] + [0.0]
+            return FakeStream(plan, model)
+
+        time.sleep(record.get("latency", 0) * self.time_scale)
+        if plan["fail_at"] is not None:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://replay.local"))
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content="".join(plan["tokens"])))],
+            usage=SimpleNamespace(
+                prompt_tokens=plan["prompt_tokens"],
+                completion_tokens=plan["completion_tokens"],
+                prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+            ),
+        )
@@ -0,0 +1,144 @@
+import os
+import threading
+
+import httpx
+import streamlit as st
+from openai import DefaultHttpxClient, OpenAI
+
+from .cassettes import RecordingClient, ReplayClient
+from .fake import FakeClient
+from .resilience import CircuitBreaker
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+MOCK_BASE_URL = os.getenv("LLM_MOCK_URL", "http://127.0.0.1:8765/v1")
+CASSETTE_PATH = os.getenv("LLM_CASSETTE", "llm_traffic.jsonl")
+
+# Sized for a full Prolific batch chatting at the same time
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "32"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "120"))
+
+_pool_stats = {}
+
+
+class PoolStats:
+    """Counts requests and new TCP connections on one shared client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.transport = None
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests, new_connections = self.requests, self.new_connections
+        connections = getattr(getattr(self.transport, "_pool", None), "connections", [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused_connections": max(requests - new_connections, 0),
+            "reuse_ratio": round(1 - new_connections / requests, 3) if requests else None,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "max_connections": MAX_CONNECTIONS,
+        }
+
+
+@st.cache_resource
+def get_client(base_url=OPENROUTER_BASE_URL, api_key_env="OPENROUTER_API_KEY", api_key=None):
+    # One client per process: every session shares its keep-alive connection pool
+    stats = PoolStats()
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        event_hooks={"request": [stats.on_request]},
+    )
+    stats.transport = http_client._transport
+    _pool_stats[base_url] = stats
+    return OpenAI(base_url=base_url, api_key=api_key or os.getenv(api_key_env), http_client=http_client)
+
+
+@st.cache_resource
+def get_fake_client():
+    return FakeClient()
+
+
+@st.cache_resource
+def get_replay_client(pattern, time_scale):
+    return ReplayClient(pattern, time_scale=time_scale)
+
+
+@st.cache_resource
+def get_local_model_client():
+    # Imported here so torch/transformers are only needed when this backend is used
+    from .local_model import LocalModelClient
+
+    return LocalModelClient()
+
+
+@st.cache_resource
+def get_recording_client(_client, path):
+    return RecordingClient(_client, path)
+
+
+def get_backend(default="openrouter"):
+    """The chat backend for this process, chosen with ``LLM_BACKEND``.
+
+    Every backend exposes the OpenAI SDK's ``chat.completions.create``:
+    ``openrouter`` / ``openai`` are the real providers, ``mock`` is the same
+    client pointed at ``mock_server``, ``fake`` answers in-process,
+    ``local`` runs a small quantized model on CPU and ``replay`` serves
+    traffic recorded earlier. ``LLM_RECORD=path`` records
+    whatever backend is in use (see ``cassettes``).
+    """
+    backend = os.getenv("LLM_BACKEND", default)
+    if backend == "openrouter":
+        client = get_client()
+    elif backend == "openai":
+        client = get_client(base_url=None, api_key_env="OPENAI_API_KEY")
+    elif backend == "mock":
+        client = get_client(base_url=MOCK_BASE_URL, api_key_env="LLM_MOCK_API_KEY", api_key="mock")
+    elif backend == "fake":
+        client = get_fake_client()
+    elif backend == "local":
+        client = get_local_model_client()
+    elif backend == "replay":
+        client = get_replay_client(CASSETTE_PATH + "*", float(os.getenv("LLM_REPLAY_TIME_SCALE", "1")))
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+    record_path = os.getenv("LLM_RECORD")
+    if record_path:
+        return get_recording_client(client, record_path)
+    return client
+
+
+def pool_stats(base_url=OPENROUTER_BASE_URL):
+    stats = _pool_stats.get(base_url)
+    return stats.snapshot() if stats else None
+
+
+@st.cache_resource
+def get_circuit_breaker(_client, model):
+    # One breaker per model, shared by every session in the process
+    def probe():
+        _client.with_options(max_retries=0, timeout=15).chat.completions.create(
+            model=model, messages=[{"role": "user", "content": "ping"}], max_tokens=1
+        )
+
+    return CircuitBreaker(probe=probe)
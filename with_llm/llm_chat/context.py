@@ -0,0 +1,185 @@
+import hashlib
+import os
+import re
+import threading
+
+from .accounting import count_tokens
+from .streaming import ChatStream, api_messages
+
+# Most recent user/assistant turns sent verbatim on every request
+CONTEXT_TURNS = int(os.getenv("LLM_CONTEXT_TURNS", "10"))
+# Older turns are folded into the summary this many at a time, so the
+# summary is only recomputed every few turns rather than on every message
+FOLD_TURNS = int(os.getenv("LLM_FOLD_TURNS", "4"))
+# Writes the rolling summary; a small model is plenty and keeps it cheap
+SUMMARY_MODEL = os.getenv("LLM_SUMMARY_MODEL", "openai/gpt-4o-mini")
+# Upper bound on essay text attached to a single message
+ESSAY_TOKEN_BUDGET = int(os.getenv("LLM_ESSAY_TOKEN_BUDGET", "1500"))
+
+TASK_INSTRUCTIONS = (
+    "You are the AI assistant in a writing study. The participant is writing a 300-500 word essay "
+    "in a text box next to this chat and may ask you for help at any stage: brainstorming, outlining, "
+    "feedback, or editing. The conversation may include a summary of earlier messages and excerpts "
+    "of the participant's current essay."
+)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a participant writing an essay "
+    "and an AI writing assistant. Update the summary with the new messages. Keep the participant's "
+    "goals, ideas, decisions and open requests, and anything the assistant already suggested. "
+    "Reply with the updated summary only, in under 200 words."
+)
+
+
+def study_system_prompt(essay_prompt, system_prompt="You are a helpful assistant."):
+    # Byte-identical for every participant of a variant and always sent first,
+    # so the provider can serve it from its prompt cache. Anything that varies
+    # (summary, history, essay excerpts) goes after it.
+    return f"{system_prompt}\n\n{TASK_INSTRUCTIONS}\n\nEssay prompt: {essay_prompt}"
+
+
+class ContextWindow:
+    """Bounded chat context for one session.
+
+    The last ``keep_turns`` turns are sent as-is; everything before them is
+    represented by a summary that is extended incrementally as the window
+    moves. ``st.session_state.messages`` itself is never truncated.
+
+    ``build`` only reads the current summary, so it never waits on the
+    model. ``fold`` updates the summary and is meant to run after a reply,
+    off the reply path, so the next turn finds it ready. A superseded turn's
+    worker can still be running when the next turn starts, so both take a
+    lock around the summary state.
+    """
+
+    def __init__(self, keep_turns=CONTEXT_TURNS, fold_turns=FOLD_TURNS):
+        self.keep_turns = keep_turns
+        self.fold_turns = fold_turns
+        self.summary = ""
+        self.folded = 0  # number of leading messages already in the summary
+        self._folding = False
+        self._lock = threading.Lock()
+
+    def _reset_if_shorter(self, messages):
+        if len(messages) < self.folded:
+            # The conversation was reset
+            self.summary, self.folded = "", 0
+
+    def _next_cutoff(self, messages):
+        overflow = len(messages) - self.folded - 2 * self.keep_turns
+        if overflow < 2 * self.fold_turns:
+            return None
+        # Keep the cut on a user message so the recent window starts with a question
+        cutoff = self.folded + overflow
+        while cutoff > self.folded and messages[cutoff]["role"] != "user":
+            cutoff -= 1
+        return cutoff if cutoff > self.folded else None
+
+    def fold(self, client, messages, scheduler=None, model=SUMMARY_MODEL):
+        """Folds turns that have left the recent window into the summary.
+
+        Returns the summary request (a finished ChatStream) so the caller can
+        record its usage, or None when nothing was due. A failed request
+        leaves the summary as it was; those turns are folded on a later call.
+        """
+        with self._lock:
+            self._reset_if_shorter(messages)
+            cutoff = self._next_cutoff(messages)
+            if cutoff is None or self._folding:
+                return None
+            self._folding = True
+            folded, summary = self.folded, self.summary
+
+        transcript = "\n\n".join(f"{m['role']}: {m['content']}" for m in messages[folded:cutoff])
+        request = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"},
+        ]
+        reply = ChatStream(client, model, request, stream=False, scheduler=scheduler)
+        try:
+            for _ in reply:
+                pass
+        finally:
+            with self._lock:
+                self._folding = False
+                updated = reply.text.strip()
+                # Skipped if the conversation was reset while the summary was written
+                if not reply.error and updated and (self.folded, self.summary) == (folded, summary):
+                    self.summary, self.folded = updated, cutoff
+        if reply.error or not updated:
+            # Sending a longer prompt beats dropping turns we could not summarize
+            print(f"[llm context] summary of {cutoff - folded} messages failed: {reply.error!r}")
+        return reply
+
+    def build(self, messages):
+        with self._lock:
+            self._reset_if_shorter(messages)
+            summary, folded = self.summary, self.folded
+        context = []
+        if summary:
+            context.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        context.extend(api_messages(messages[folded:]))
+        return context
+
+
+def split_paragraphs(text):
+    return [p.strip() for p in re.split(r"\n\s*\n", text or "") if p.strip()]
+
+
+def paragraph_hash(paragraph):
+    return hashlib.sha1(" ".join(paragraph.split()).encode()).hexdigest()[:12]
+
+
+class EssayTracker:
+    """Works out which essay paragraphs the model has not seen yet.
+
+    Paragraphs are compared by hash, so each turn only carries the ones that
+    are new or edited since the last message, capped at ``token_budget``.
+    The full essay is resent once the message that carried it has been
+    folded out of the context window (or the conversation was reset).
+    """
+
+    def __init__(self, token_budget=ESSAY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.seen = set()  # paragraph hashes the model has been sent
+        self.last = []  # paragraph hashes of the essay at the previous message
+        self.base_index = None  # message that carried the full essay
+
+    def context_for(self, essay, message_index, visible_from=0):
+        paragraphs = split_paragraphs(essay)
+        hashes = [paragraph_hash(p) for p in paragraphs]
+
+        resync = self.base_index is None or not visible_from <= self.base_index < message_index
+        if resync:
+            self.seen = set()
+            self.last = []
+            self.base_index = message_index
+
+        removed = len(set(self.last) - set(hashes))
+        changed = [(i, p, h) for i, (p, h) in enumerate(zip(paragraphs, hashes)) if h not in self.seen]
+        self.last = hashes
+        if not changed and not removed:
+            return None
+
+        lines = []
+        budget = self.token_budget
+        for i, paragraph, h in changed:
+            cost = count_tokens(paragraph) + 4
+            if cost > budget:
+                break
+            budget -= cost
+            lines.append(f"[{i + 1}] {paragraph}")
+            self.seen.add(h)
+        omitted = len(changed) - len(lines)
+
+        if resync:
+            header = f"The participant's current essay ({len(paragraphs)} paragraphs):"
+        else:
+            header = f"The participant's essay changed since the last message. It now has {len(paragraphs)} paragraphs."
+            if removed:
+                header += f" {removed} earlier paragraph(s) were removed or rewritten."
+            if lines:
+                header += " New or edited paragraphs, numbered by position:"
+        if omitted:
+            lines.append(f"({omitted} more changed paragraph(s) omitted for length)")
+        return "\n\n".join([header, *lines])
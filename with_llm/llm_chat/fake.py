@@ -0,0 +1,164 @@
+import os
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from .accounting import count_message_tokens
+
+FILLER = (
+    "Here is a simulated reply from the offline test backend. It stands in for a real model so the "
+    "study flow can be exercised and benchmarked without network access or API spend. Consider "
+    "opening with a clear thesis, then support it with two or three concrete examples, and close by "
+    "addressing the strongest counterargument before restating your position."
+).split(" ")
+
+ERROR_TYPES = {429: openai.RateLimitError, 500: openai.InternalServerError, 502: openai.InternalServerError,
+               503: openai.InternalServerError}
+
+
+def _env(name, default):
+    return type(default)(os.getenv(name, default))
+
+
+class FakeModel:
+    """Behavior of the offline backends (in-process fake and mock server).
+
+    Time to first token is log-normal around ``ttft_median`` seconds,
+    tokens then arrive at ``tokens_per_second``. Replies are
+    ``reply_tokens`` words long (a ``(min, max)`` range). ``error_rate`` of
+    requests fail up front with ``error_status``; ``midstream_error_rate``
+    of streams break off after some tokens.
+    """
+
+    def __init__(self, ttft_median=0.8, ttft_sigma=0.5, tokens_per_second=40.0, reply_tokens=(80, 250),
+                 error_rate=0.0, error_status=503, midstream_error_rate=0.0, seed=None):
+        self.ttft_median = ttft_median
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.midstream_error_rate = midstream_error_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttft_median=_env("LLM_FAKE_TTFT_MEDIAN", 0.8),
+            ttft_sigma=_env("LLM_FAKE_TTFT_SIGMA", 0.5),
+            tokens_per_second=_env("LLM_FAKE_TOKENS_PER_SECOND", 40.0),
+            reply_tokens=(_env("LLM_FAKE_MIN_TOKENS", 80), _env("LLM_FAKE_MAX_TOKENS", 250)),
+            error_rate=_env("LLM_FAKE_ERROR_RATE", 0.0),
+            error_status=_env("LLM_FAKE_ERROR_STATUS", 503),
+            midstream_error_rate=_env("LLM_FAKE_MIDSTREAM_ERROR_RATE", 0.0),
+        )
+
+    def plan(self, messages, max_tokens=None):
+        """Draw one request's outcome: a dict with timings, tokens and any injected failure."""
+        with self._lock:
+            n_tokens = self.random.randint(*self.reply_tokens)
+            if max_tokens:
+                n_tokens = min(n_tokens, max_tokens)
+            tokens = [FILLER[i % len(FILLER)] + " " for i in range(n_tokens)]
+            fail_at = None
+            if self.random.random() < self.midstream_error_rate:
+                fail_at = self.random.randint(1, max(n_tokens - 1, 1))
+            return {
+                "error": self.error_status if self.random.random() < self.error_rate else None,
+                "ttft": self.random.lognormvariate(0, self.ttft_sigma) * self.ttft_median,
+                "token_delay": 1 / self.tokens_per_second,
+                "tokens": tokens,
+                "fail_at": fail_at,
+                "prompt_tokens": count_message_tokens(messages),
+            }
+
+
+def status_error(status, url="http://fake.local/v1/chat/completions"):
+    response = httpx.Response(status, request=httpx.Request("POST", url))
+    error_type = ERROR_TYPES.get(status, openai.APIStatusError)
+    return error_type(f"Injected error {status}", response=response, body=None)
+
+
+def _usage(plan, completion_tokens):
+    return SimpleNamespace(
+        prompt_tokens=plan["prompt_tokens"],
+        completion_tokens=completion_tokens,
+        total_tokens=plan["prompt_tokens"] + completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+    )
+
+
+def delta_chunk(model, text):
+    return SimpleNamespace(model=model, usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def usage_chunk(model, usage):
+    return SimpleNamespace(model=model, choices=[], usage=usage)
+
+
+class FakeStream:
+    """Streaming response shaped like the OpenAI SDK's: iterate chunks, ``close()`` to abort."""
+
+    def __init__(self, plan, model):
+        self.plan = plan
+        self.model = model
+        self._closed = threading.Event()
+
+    def close(self):
+        self._closed.set()
+
+    def _delay(self, i):
+        # Replayed streams carry their recorded per-token delays
+        if "delays" in self.plan:
+            return self.plan["delays"][i]
+        return self.plan["ttft"] if i == 0 else self.plan["token_delay"]
+
+    def __iter__(self):
+        plan = self.plan
+        for i, token in enumerate(plan["tokens"]):
+            if self._closed.wait(self._delay(i)):
+                raise openai.APIConnectionError(request=httpx.Request("POST", "http://fake.local"))
+            if i == plan["fail_at"]:
+                raise openai.APIConnectionError(request=httpx.Request("POST", "http://fake.local"))
+            yield delta_chunk(self.model, token)
+        completion_tokens = plan.get("completion_tokens", len(plan["tokens"]))
+        yield usage_chunk(self.model, _usage(plan, completion_tokens))
+
+
+class _FakeCompletions:
+    def __init__(self, model_behavior):
+        self.behavior = model_behavior
+
+    def create(self, model, messages, stream=False, max_tokens=None, **params):
+        plan = self.behavior.plan(messages, max_tokens)
+        if plan["error"]:
+            time.sleep(plan["ttft"])
+            raise status_error(plan["error"])
+        if stream:
+            return FakeStream(plan, model)
+        time.sleep(plan["ttft"] + plan["token_delay"] * len(plan["tokens"]))
+        if plan["fail_at"] is not None:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://fake.local"))
+        return SimpleNamespace(
+            id=f"fake-{uuid.uuid4().hex[:12]}",
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content="".join(plan["tokens"])))],
+            usage=_usage(plan, len(plan["tokens"])),
+        )
+
+
+class FakeClient:
+    """In-process stand-in for the OpenAI client (only ``chat.completions.create`` is used)."""
+
+    def __init__(self, behavior=None):
+        self.behavior = behavior or FakeModel.from_env()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self.behavior))
+
+    def with_options(self, **options):
+        return self
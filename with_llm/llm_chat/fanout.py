@@ -0,0 +1,81 @@
+import threading
+
+# Participants see anonymous labels, not model names
+PANEL_LABELS = "ABCDEFGH"
+
+
+def model_view(messages, index):
+    """The conversation as model ``index`` saw it: side-by-side turns carry one
+    reply per model, and each model continues from its own earlier answers."""
+    view = []
+    for m in messages:
+        responses = m.get("responses")
+        if responses and m.get("fanout") == "side_by_side" and index < len(responses):
+            m = {**m, "content": responses[index]["content"]}
+        view.append(m)
+    return view
+
+
+class FanOut:
+    """Sends one turn to several models at once and collects every reply.
+
+    ``streams`` are ChatStreams, each consumed on its own thread, so the turn
+    takes as long as the slowest model (``"side_by_side"``) or the fastest one
+    (``"fastest"``). In ``"fastest"`` mode the first stream to produce a token
+    is copied into ``shown`` as it arrives; once it finishes the others are
+    cancelled, and their timing up to that point is kept. ``screen``, e.g.
+    ``ModerationCheck.screen``, wraps every stream before its deltas are shown.
+    """
+
+    def __init__(self, streams, display="side_by_side", shown=None, screen=None):
+        self.streams = streams
+        self.display = display
+        self.screen = screen
+        self.parts = [[] for _ in streams]
+        self.shown = shown if shown is not None else []
+        self.leader = None
+        self._lock = threading.Lock()
+
+    def _consume(self, index):
+        stream = self.streams[index]
+        for delta in self.screen(stream) if self.screen else stream:
+            self.parts[index].append(delta)
+            if self.display != "fastest":
+                continue
+            with self._lock:
+                if self.leader is None and stream.ttft is not None:
+                    self.leader = index
+                if self.leader == index:
+                    self.shown.append(delta)
+        if self.display == "fastest" and self.leader == index:
+            for i, other in enumerate(self.streams):
+                if i != index:
+                    other.cancel("lost_race")
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._consume, args=(i,), name=f"llm-fanout-{i}", daemon=True)
+            for i in range(len(self.streams))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.display == "fastest" and self.leader is None:
+            # Nobody produced a token: show the first model's error
+            self.leader = 0
+            self.shown[:] = self.parts[0]
+        return self
+
+    def as_message(self, usages):
+        responses = []
+        for i, (stream, usage) in enumerate(zip(self.streams, usages)):
+            response = stream.as_message(usage)
+            del response["role"]
+            response["label"] = PANEL_LABELS[i]
+            responses.append(response)
+        shown = self.leader if self.display == "fastest" else 0
+        message = {"role": "assistant", "content": responses[shown]["content"], "fanout": self.display, "responses": responses}
+        if self.display == "fastest":
+            message["shown"] = responses[shown]["label"]
+        return message
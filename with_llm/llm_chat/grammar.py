@@ -0,0 +1,157 @@
+import re
+import time
+
+# "check my grammar: <paragraph>", "can you proofread this?\n<paragraph>", ...
+# The ask has to name grammar, spelling or typos; "check this" alone may be an open-ended ask
+REQUEST_PATTERN = re.compile(
+    r"\b(check|fix|correct|look over)\b[^.?!:\n]{0,40}?"
+    r"\b(grammar|grammatical|spelling|typos?|punctuation)\b"
+    r"|\bproof-?read\b|\bspell-?check\b|\b(grammar|spelling) check\b",
+    re.IGNORECASE,
+)
+# Shorter pastes are more likely a question than a paragraph to check
+MIN_PASSAGE_WORDS = 20
+# Open-ended asks still go to the model
+OPEN_ENDED_PATTERN = re.compile(
+    r"\b(improve|rewrite|feedback|argument|flow|stronger|better|clearer|suggest|ideas?|structure|why)\b",
+    re.IGNORECASE,
+)
+
+COMMON_MISSPELLINGS = {
+    "accomodate": "accommodate", "acheive": "achieve", "acknowlege": "acknowledge",
+    "adress": "address", "agressive": "aggressive", "alot": "a lot", "apparant": "apparent",
+    "arguement": "argument", "basicly": "basically", "becuase": "because", "begining": "beginning",
+    "beleive": "believe", "belive": "believe", "buisness": "business",
+    "comming": "coming", "commited": "committed", "completly": "completely", "concious": "conscious",
+    "definately": "definitely", "definatly": "definitely",
+    "dissapoint": "disappoint", "embarass": "embarrass", "enviroment": "environment",
+    "existance": "existence", "experiance": "experience", "familar": "familiar",
+    "finaly": "finally", "foriegn": "foreign", "freind": "friend", "goverment": "government",
+    "happyness": "happiness", "happines": "happiness", "harrass": "harass", "havent": "haven't",
+    "immediatly": "immediately", "independant": "independent", "interupt": "interrupt",
+    "knowlege": "knowledge", "lenght": "length", "libary": "library", "lisence": "license",
+    "maintainance": "maintenance", "monye": "money",
+    "neccessary": "necessary", "necesary": "necessary", "noticable": "noticeable",
+    "occassion": "occasion", "occured": "occurred", "occurence": "occurrence",
+    "oppurtunity": "opportunity", "persue": "pursue", "posession": "possession",
+    "prefered": "preferred", "probaly": "probably", "publically": "publicly",
+    "realy": "really", "recieve": "receive", "recomend": "recommend", "refered": "referred",
+    "relevent": "relevant", "religous": "religious", "rember": "remember", "seperate": "separate",
+    "sucess": "success", "succesful": "successful", "suprise": "surprise",
+    "teh": "the", "tendancy": "tendency", "thier": "their",
+    "threshhold": "threshold", "tommorow": "tomorrow", "tounge": "tongue", "truely": "truly",
+    "unfortunatly": "unfortunately", "untill": "until", "wierd": "weird", "wich": "which",
+    "wealthly": "wealthy", "whereever": "wherever", "writting": "writing", "doesnt": "doesn't",
+    "dont": "don't", "isnt": "isn't", "im": "I'm",
+}
+# Left alone by every rule: links, domains, e-mail addresses and numbers like 3.5
+PROTECTED_PATTERN = re.compile(
+    r"\b(?:https?://|www\.)\S+|\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+|\b[\w-]+(?:\.[\w-]+)*\.[a-z]{2,6}\b(?:/\S*)?"
+    r"|\d+(?:[.,:]\d+)+",
+    re.IGNORECASE,
+)
+# A full stop after these does not end the sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "etc", "approx", "inc", "ltd", "co",
+    "no", "fig", "cf", "al", "dept", "est", "min", "max",
+}
+DOTTED_ABBREVIATION = re.compile(r"(?:[A-Za-z]\.)*[A-Za-z]")
+
+
+def capitalize_sentence(match):
+    # "the U.S. report", "e.g. a car", "Dr. smith": not a new sentence
+    before = match.string[:match.start()].split()
+    if match.group(1) and before:
+        word = before[-1].lstrip("(\"'“")
+        if DOTTED_ABBREVIATION.fullmatch(word) or word.lower() in ABBREVIATIONS:
+            return match.group(0)
+    return match.group(1) + match.group(2).upper()
+
+
+# (pattern, replacement, explanation), applied in order
+RULES = [
+    (re.compile(r"\b(?!had\b|that\b)(\w+) \1\b", re.IGNORECASE), r"\1", "repeated word"),
+    (re.compile(r"\b(could|would|should|must|might) of\b", re.IGNORECASE), r"\1 have", '"of" after a modal verb should be "have"'),
+    (re.compile(r"\bi\b"), "I", '"I" is always capitalized'),
+    (re.compile(r"\ba (?=(?!one|once|eu)[aeio]\w)", re.IGNORECASE), "an ", '"an" before a vowel sound'),
+    (re.compile(r"\ban (?=[bcdfgjklmnpqrstvwxz]\w)", re.IGNORECASE), "a ", '"a" before a consonant sound'),
+    (re.compile(r" +([,.;:!?])"), r"\1", "space before punctuation"),
+    (re.compile(r"([,;:!?])(?=[A-Za-z])"), r"\1 ", "missing space after punctuation"),
+    (re.compile(r"(?<=\S)  +(?=\S)"), " ", "double space"),
+    (re.compile(r"(^|[.!?]\s+)([a-z])"), capitalize_sentence, "sentence should start with a capital letter"),
+]
+WORD_PATTERN = re.compile(r"\b[A-Za-z]+\b")
+
+
+def is_grammar_request(text):
+    """A request to check spelling/grammar of a pasted passage, and nothing more."""
+    passage = extract_passage(text)
+    if passage is None or len(passage.split()) < MIN_PASSAGE_WORDS:
+        return False
+    ask = text[: len(text) - len(passage)]
+    return bool(REQUEST_PATTERN.search(ask)) and not OPEN_ENDED_PATTERN.search(ask)
+
+
+def extract_passage(text):
+    # The paragraph follows the ask after a colon or a line break, or is quoted
+    quoted = re.search(r'["“](.{40,})["”]\s*$', text, re.DOTALL)
+    if quoted:
+        return quoted.group(1).strip()
+    match = re.search(r"[:\n]\s*(.+)$", text, re.DOTALL)
+    return match.group(1).strip() if match else None
+
+
+def check_text(passage):
+    """Fixes ``passage`` with the rules above; returns (corrected, issues)."""
+    issues = []
+    protected = []
+
+    def protect(match):
+        protected.append(match.group(0))
+        return f"\x00{len(protected) - 1}\x00"
+
+    def fix_spelling(match):
+        word = match.group(0)
+        fixed = COMMON_MISSPELLINGS.get(word.lower())
+        if fixed is None or fixed == word.lower():
+            return word
+        if word[0].isupper():
+            fixed = fixed[0].upper() + fixed[1:]
+        issues.append((word, fixed, "spelling"))
+        return fixed
+
+    corrected = WORD_PATTERN.sub(fix_spelling, PROTECTED_PATTERN.sub(protect, passage))
+    for pattern, replacement, reason in RULES:
+        def apply(match, replacement=replacement, reason=reason):
+            fixed = replacement(match) if callable(replacement) else match.expand(replacement)
+            if fixed != match.group(0):
+                issues.append((match.group(0), fixed, reason))
+            return fixed
+
+        corrected = pattern.sub(apply, corrected)
+    corrected = re.sub(r"\x00(\d+)\x00", lambda m: protected[int(m.group(1))], corrected)
+    if corrected and corrected[-1] not in ".!?\"'”)":
+        corrected += "."
+        issues.append(("(end of text)", ".", "missing final punctuation"))
+    return corrected, issues
+
+
+def grammar_reply(text):
+    """The assistant message for a grammar-check request, or None to use the LLM."""
+    if not is_grammar_request(text):
+        return None
+    start = time.perf_counter()
+    corrected, issues = check_text(extract_passage(text))
+    if issues:
+        listed = "\n".join(f'- "{before}" → "{after}" ({reason})' for before, after, reason in issues)
+        content = f"I found {len(issues)} spelling/grammar issue(s):\n\n{listed}\n\n**Corrected text:**\n\n{corrected}"
+    else:
+        content = "I didn't find any spelling or grammar mistakes in that passage."
+    content += "\n\n_This was a quick automatic check. Ask me if you would like feedback on style or argument._"
+    return {
+        "role": "assistant",
+        "content": content,
+        "path": "grammar_rules",
+        "timing": {"queue_wait": 0.0, "ttft": None, "latency": round(time.perf_counter() - start, 4)},
+        "grammar_issues": len(issues),
+    }
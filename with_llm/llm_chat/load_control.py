@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class LoadController:
+    """Chooses the model tier and ``max_tokens`` for new requests.
+
+    ``tiers`` are ordered from preferred to fastest, e.g.
+    ``[{"model": "openai/gpt-5.2"}, {"model": "openai/gpt-4o-mini", "max_tokens": 600}]``.
+    When the scheduler queue backs up or recent p95 latency goes above
+    ``p95_high``, new requests step down one tier. They step back up once
+    p95 drops below ``p95_low`` with an empty queue, at most once per
+    ``cooldown`` seconds.
+    """
+
+    def __init__(self, tiers, scheduler=None, p95_high=12.0, p95_low=6.0, queue_high=4,
+                 window=50, min_samples=10, cooldown=60.0):
+        self.tiers = tiers
+        self.scheduler = scheduler
+        self.p95_high = p95_high
+        self.p95_low = p95_low
+        self.queue_high = queue_high
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.tier = 0
+        self._latencies = deque(maxlen=window)
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, reply):
+        if reply.error is None and reply.latency is not None:
+            with self._lock:
+                self._latencies.append(reply.latency)
+
+    def decide(self):
+        queued = self.scheduler.snapshot()["queued"] if self.scheduler is not None else 0
+        with self._lock:
+            p95 = percentile(self._latencies, 0.95) if len(self._latencies) >= self.min_samples else None
+            now = time.monotonic()
+            reason = "steady"
+            under_pressure = queued >= self.queue_high or (p95 is not None and p95 > self.p95_high)
+            recovered = queued == 0 and p95 is not None and p95 < self.p95_low
+            if under_pressure and self.tier < len(self.tiers) - 1 and now - self._changed_at >= self.cooldown / 4:
+                self.tier += 1
+                self._changed_at = now
+                # Latencies from the old tier no longer describe the new one
+                self._latencies.clear()
+                reason = "downgraded"
+            elif recovered and self.tier > 0 and now - self._changed_at >= self.cooldown:
+                self.tier -= 1
+                self._changed_at = now
+                self._latencies.clear()
+                reason = "recovered"
+            tier = self.tiers[self.tier]
+            return {
+                "tier": self.tier,
+                "model": tier["model"],
+                "max_tokens": tier.get("max_tokens"),
+                "reason": reason,
+                "queued": queued,
+                "p95": round(p95, 3) if p95 is not None else None,
+            }
+
+
+@st.cache_resource
+def get_load_controller(tiers, _scheduler=None):
+    return LoadController(tiers, scheduler=_scheduler)
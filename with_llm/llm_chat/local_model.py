@@ -0,0 +1,195 @@
+"""CPU-only local model backend for pilots and offline dry-runs (``LLM_BACKEND=local``).
+
+Needs ``pip install torch transformers``. A small instruct model is loaded
+once per process with int8 dynamic quantization. Requests arriving from
+different sessions within ``batch_window`` seconds share one batch, so each
+decoding step is a single forward pass for up to ``max_batch`` participants.
+
+Batches are static: a batch runs until its last sequence finishes (at most
+``max_new_tokens`` steps) before the next one is formed, so a request that
+arrives mid-batch waits for that whole generation (head-of-line blocking).
+Lower ``LLM_LOCAL_MAX_NEW_TOKENS`` to bound that wait.
+"""
+import os
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+from .fake import delta_chunk, usage_chunk
+
+LOCAL_MODEL = os.getenv("LLM_LOCAL_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+MAX_BATCH = int(os.getenv("LLM_LOCAL_MAX_BATCH", "4"))
+BATCH_WINDOW = float(os.getenv("LLM_LOCAL_BATCH_WINDOW", "0.05"))
+MAX_NEW_TOKENS = int(os.getenv("LLM_LOCAL_MAX_NEW_TOKENS", "512"))
+
+
+class _Request:
+    def __init__(self, messages, max_tokens, temperature):
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.events = queue.Queue()
+        self.closed = threading.Event()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class LocalStream:
+    def __init__(self, request, model):
+        self.request = request
+        self.model = model
+
+    def close(self):
+        # The generation loop drops closed requests from the batch at the next step;
+        # the terminal event unblocks a reader whose request has not started yet
+        self.request.closed.set()
+        self.request.events.put(("closed", None))
+
+    def __iter__(self):
+        while True:
+            kind, value = self.request.events.get()
+            if kind == "delta":
+                yield delta_chunk(self.model, value)
+            elif kind == "error":
+                raise value
+            elif kind == "closed":
+                return
+            else:
+                yield usage_chunk(self.model, SimpleNamespace(
+                    prompt_tokens=self.request.prompt_tokens,
+                    completion_tokens=self.request.completion_tokens,
+                    prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+                ))
+                return
+
+
+class LocalModelClient:
+    """Chat backend running a quantized model on CPU, with micro-batching across sessions."""
+
+    def __init__(self, model_name=LOCAL_MODEL, max_batch=MAX_BATCH, batch_window=BATCH_WINDOW,
+                 max_new_tokens=MAX_NEW_TOKENS, quantize=True):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self.torch = torch
+        torch.set_num_threads(os.cpu_count() or 1)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
+        if self.tokenizer.pad_token_id is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+        eos = model.generation_config.eos_token_id
+        self.eos_ids = set(eos if isinstance(eos, list) else [eos]) | {self.tokenizer.eos_token_id}
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_new_tokens = max_new_tokens
+        self._pending = queue.Queue()
+        threading.Thread(target=self._serve, name="llm-local-model", daemon=True).start()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        return self
+
+    def _create(self, model, messages, stream=False, max_tokens=None, temperature=0.7, **params):
+        request = _Request(messages, min(max_tokens or self.max_new_tokens, self.max_new_tokens), temperature)
+        self._pending.put(request)
+        response = LocalStream(request, model)
+        if stream:
+            return response
+        text = "".join(chunk.choices[0].delta.content for chunk in response if chunk.choices)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=text))],
+            usage=SimpleNamespace(
+                prompt_tokens=request.prompt_tokens,
+                completion_tokens=request.completion_tokens,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+            ),
+        )
+
+    def _serve(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            for request in batch:
+                if request.closed.is_set():
+                    request.events.put(("done", None))
+            batch = [request for request in batch if not request.closed.is_set()]
+            if not batch:
+                continue
+            try:
+                self._generate(batch)
+            except Exception as e:
+                for request in batch:
+                    request.events.put(("error", e))
+
+    def _generate(self, batch):
+        torch = self.torch
+        prompts = [
+            self.tokenizer.apply_chat_template(r.messages, tokenize=False, add_generation_prompt=True) for r in batch
+        ]
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        attention_mask = inputs["attention_mask"]
+        for request, mask in zip(batch, attention_mask):
+            request.prompt_tokens = int(mask.sum())
+
+        # Left padding: positions count real tokens only
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        input_ids = inputs["input_ids"]
+        past = None
+        generated = [[] for _ in batch]
+        emitted = ["" for _ in batch]
+        finished = [False for _ in batch]
+        temperatures = torch.tensor([[max(r.temperature, 1e-5)] for r in batch])
+        greedy = torch.tensor([r.temperature <= 0 for r in batch])
+
+        with torch.no_grad():
+            for _ in range(max(r.max_tokens for r in batch)):
+                out = self.model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    position_ids=position_ids,
+                    past_key_values=past,
+                    use_cache=True,
+                )
+                past = out.past_key_values
+                logits = out.logits[:, -1, :]
+                sampled = torch.multinomial(torch.softmax(logits / temperatures, dim=-1), 1).squeeze(-1)
+                next_ids = torch.where(greedy, logits.argmax(-1), sampled)
+
+                for i, request in enumerate(batch):
+                    if finished[i]:
+                        continue
+                    token = int(next_ids[i])
+                    stop = request.closed.is_set() or token in self.eos_ids
+                    if not stop:
+                        generated[i].append(token)
+                        request.completion_tokens = len(generated[i])
+                        # Decode the whole sequence so multi-token characters come out whole
+                        text = self.tokenizer.decode(generated[i], skip_special_tokens=True)
+                        if len(text) > len(emitted[i]) and not text.endswith("\ufffd"):
+                            request.events.put(("delta", text[len(emitted[i]):]))
+                            emitted[i] = text
+                    if stop or len(generated[i]) >= request.max_tokens:
+                        finished[i] = True
+                        request.events.put(("done", None))
+                if all(finished):
+                    break
+
+                input_ids = next_ids[:, None]
+                attention_mask = torch.cat([attention_mask, torch.ones_like(input_ids)], dim=-1)
+                position_ids = position_ids[:, -1:] + 1
+
+        for i, request in enumerate(batch):
+            if not finished[i]:
+                request.events.put(("done", None))
@@ -0,0 +1,124 @@
+"""OpenAI-compatible mock server for offline load tests.
+
+    cd with_llm && python -m llm_chat.mock_server --port 8765
+
+then run the apps with ``LLM_BACKEND=mock`` (and ``LLM_MOCK_URL`` if the
+port differs). Latency, token rate and error injection come from the
+``LLM_FAKE_*`` environment variables, see ``FakeModel``.
+"""
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fake import FakeModel
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behavior = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        plan = self.behavior.plan(request.get("messages", []), request.get("max_tokens"))
+        model = request.get("model", "mock")
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        usage = {
+            "prompt_tokens": plan["prompt_tokens"],
+            "completion_tokens": len(plan["tokens"]),
+            "total_tokens": plan["prompt_tokens"] + len(plan["tokens"]),
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+        if plan["error"]:
+            time.sleep(plan["ttft"])
+            self._send_json(plan["error"], {"error": {"message": f"Injected error {plan['error']}"}})
+            return
+
+        if not request.get("stream"):
+            time.sleep(plan["ttft"] + plan["token_delay"] * len(plan["tokens"]))
+            if plan["fail_at"] is not None:
+                self.close_connection = True
+                return
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(plan["tokens"])},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(plan["tokens"]):
+                time.sleep(plan["ttft"] if i == 0 else plan["token_delay"])
+                if i == plan["fail_at"]:
+                    # Break the stream without the terminating chunk
+                    self.close_connection = True
+                    return
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            if (request.get("stream_options") or {}).get("include_usage"):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [], "usage": usage}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the request
+            self.close_connection = True
+
+
+def serve(host="127.0.0.1", port=8765, behavior=None):
+    handler = type("Handler", (MockHandler,), {"behavior": behavior or FakeModel.from_env()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = serve(args.host, args.port)
+    print(f"Mock LLM server on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,115 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import streamlit as st
+
+from .client import get_client
+
+# How long a reply is held back waiting for a verdict before failing open
+MODERATION_TIMEOUT = float(os.getenv("LLM_MODERATION_TIMEOUT", "5"))
+MODERATION_NOTICE = (
+    "I can't help with that request. If you think this is a mistake, please rephrase "
+    "your message or contact the study team."
+)
+
+# Stand-in for a hosted classifier, for tests and offline runs
+LOCAL_PATTERNS = {
+    "self-harm": r"\b(kill|hurt|harm) myself\b|\bsuicid",
+    "violence": r"\b(how to|help me) (make|build) (a )?(bomb|weapon)s?\b",
+    "harassment": r"\bkill (you|him|her|them)\b",
+}
+
+
+class LocalModerator:
+    """Flags text that matches any of a few regular expressions."""
+
+    name = "local"
+
+    def __init__(self, patterns=None):
+        self.patterns = {k: re.compile(v, re.IGNORECASE) for k, v in (patterns or LOCAL_PATTERNS).items()}
+
+    def classify(self, text):
+        categories = [name for name, pattern in self.patterns.items() if pattern.search(text)]
+        return {"flagged": bool(categories), "categories": categories}
+
+
+class OpenAIModerator:
+    """The hosted moderation endpoint (``client.moderations.create``)."""
+
+    def __init__(self, client, model="omni-moderation-latest"):
+        self.client = client
+        self.name = model
+
+    def classify(self, text):
+        result = self.client.moderations.create(model=self.name, input=text).results[0]
+        categories = [name for name, flagged in result.categories.model_dump().items() if flagged]
+        return {"flagged": result.flagged, "categories": categories}
+
+
+class ModerationCheck:
+    """One message being classified on the moderation pool.
+
+    Started as soon as the message is sent, so it overlaps the queue wait and
+    the model's time to first token. ``screen(stream)`` passes the reply
+    through once the verdict is in; for a flagged message the reply is
+    cancelled and ``MODERATION_NOTICE`` is shown instead. A moderator that
+    errors or times out lets the reply through (the verdict records why).
+    """
+
+    def __init__(self, moderator, text, pool, timeout=MODERATION_TIMEOUT):
+        self.moderator = moderator
+        self.timeout = timeout
+        self._verdict = None
+        self._start = time.perf_counter()
+        self.future = pool.submit(self._classify, text)
+
+    def _classify(self, text):
+        result = self.moderator.classify(text)
+        result["latency"] = round(time.perf_counter() - self._start, 3)
+        return result
+
+    def verdict(self):
+        if self._verdict is None:
+            try:
+                result = self.future.result(timeout=self.timeout)
+            except FutureTimeout:
+                result = {"flagged": False, "error": "timeout"}
+            except Exception as e:
+                result = {"flagged": False, "error": repr(e)}
+            self._verdict = {"moderator": self.moderator.name, **result}
+        return self._verdict
+
+    @property
+    def flagged(self):
+        return self.verdict()["flagged"]
+
+    def screen(self, stream):
+        # Only the first delta waits; the verdict is usually in well before it
+        for delta in stream:
+            if self.flagged:
+                stream.cancel("moderation")
+                yield MODERATION_NOTICE
+                return
+            yield delta
+
+
+@st.cache_resource
+def get_moderation_pool():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-moderation")
+
+
+@st.cache_resource
+def get_moderator(kind):
+    if kind == "local":
+        return LocalModerator()
+    if kind == "openai":
+        return OpenAIModerator(get_client(base_url=None, api_key_env="OPENAI_API_KEY"))
+    raise ValueError(f"Unknown moderator: {kind}")
+
+
+def start_moderation(kind, text):
+    """Classify ``text`` in the background with the ``kind`` moderator."""
+    return ModerationCheck(get_moderator(kind), text, get_moderation_pool())
@@ -0,0 +1,197 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import openai
+
+RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient API errors."""
+
+    def __init__(self, attempts=RETRY_ATTEMPTS, base_delay=0.5, max_delay=8.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class HedgedStream:
+    """Races duplicate requests and streams whichever produces output first.
+
+    ``attempts`` are zero-argument callables returning an iterator. The first
+    one starts right away; the next starts if nothing has arrived after
+    ``hedge_after`` seconds (or as soon as a running one fails). The first
+    attempt to produce an item wins, and the others are cancelled: their
+    threads stop at the next item, and ``on_cancel(index)`` is called right
+    away so the caller can close their connections.
+    """
+
+    def __init__(self, attempts, hedge_after, on_cancel=None):
+        self.attempts = attempts
+        self.hedge_after = hedge_after
+        self.on_cancel = on_cancel
+        self.winner = None
+        self.started = 0
+        self._events = queue.Queue()
+        self._cancels = []
+
+    def _run(self, index, cancel):
+        try:
+            for item in self.attempts[index]():
+                if cancel.is_set():
+                    return
+                self._events.put((index, "item", item))
+            self._events.put((index, "done", None))
+        except Exception as e:
+            self._events.put((index, "error", e))
+
+    def _cancel(self, index):
+        self._cancels[index].set()
+        if self.on_cancel is not None:
+            self.on_cancel(index)
+
+    def _start_next(self):
+        cancel = threading.Event()
+        self._cancels.append(cancel)
+        threading.Thread(target=self._run, args=(self.started, cancel), daemon=True).start()
+        self.started += 1
+
+    def __iter__(self):
+        self._start_next()
+        failed = 0
+        try:
+            while True:
+                can_hedge = self.winner is None and self.started < len(self.attempts)
+                try:
+                    index, kind, value = self._events.get(timeout=self.hedge_after if can_hedge else None)
+                except queue.Empty:
+                    self._start_next()
+                    continue
+
+                if self.winner is None:
+                    if kind == "error":
+                        failed += 1
+                        if self.started < len(self.attempts):
+                            self._start_next()
+                        elif failed == self.started:
+                            raise value
+                        continue
+                    self.winner = index
+                    for i in range(len(self._cancels)):
+                        if i != index:
+                            self._cancel(i)
+                elif index != self.winner:
+                    continue
+
+                if kind == "item":
+                    yield value
+                elif kind == "done":
+                    return
+                else:
+                    raise value
+        finally:
+            for i in range(len(self._cancels)):
+                if i != self.winner:
+                    self._cancel(i)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Shared breaker in front of the completion call.
+
+    Trips open when the recent error rate or slow-call rate crosses its
+    threshold. While open, calls fail immediately and a background thread
+    probes the backend with ``probe()`` until it answers again. State
+    changes are kept in ``transitions`` and passed to ``listeners``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, probe=None, window=20, min_calls=5, error_rate=0.5, slow_call=20.0,
+                 slow_rate=0.6, probe_interval=10.0):
+        self.probe = probe
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.probe_interval = probe_interval
+        self.state = self.CLOSED
+        self.transitions = deque(maxlen=100)
+        self.listeners = []
+        self._outcomes = deque(maxlen=window)  # (failed, slow)
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            raise CircuitOpenError(
+                "⚠️ The assistant is temporarily unavailable. Please keep writing and try again in a minute."
+            )
+
+    def record(self, failed, latency):
+        with self._lock:
+            if self.state == self.OPEN:
+                return
+            self._outcomes.append((failed, latency is not None and latency > self.slow_call))
+            if len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+            slow = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+            if failures >= self.error_rate:
+                reason = f"error rate {failures:.0%} over the last {len(self._outcomes)} calls"
+            elif slow >= self.slow_rate:
+                reason = f"{slow:.0%} of the last {len(self._outcomes)} calls slower than {self.slow_call}s"
+            else:
+                return
+            self._transition(self.OPEN, reason)
+        threading.Thread(target=self._probe_until_healthy, daemon=True).start()
+
+    def _transition(self, state, reason):
+        change = {"at": time.time(), "from": self.state, "to": state, "reason": reason}
+        self.state = state
+        self.transitions.append(change)
+        print(f"[llm circuit] {change['from']} -> {state}: {reason}")
+        for listener in self.listeners:
+            listener(change)
+
+    def _probe_until_healthy(self):
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                if self.probe is not None:
+                    self.probe()
+            except Exception as e:
+                print(f"[llm circuit] probe failed: {e}")
+                continue
+            with self._lock:
+                self._outcomes.clear()
+                self._transition(self.CLOSED, "probe succeeded")
+            return
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(1 for f, _ in self._outcomes if f),
+                "transitions": list(self.transitions)[-10:],
+            }
@@ -0,0 +1,125 @@
+"""Similarity-keyed cache of chat replies, for internal pilots only.
+
+A lookup hashes the latest user message into a sparse bag of unigrams and
+bigrams (the hashing trick, no fitted vocabulary) and returns a stored reply
+whose message is at least ``threshold`` cosine-similar and uses exactly the
+same content words, within the same scope: same model and same earlier
+conversation. The content-word check keeps near misses such as "happiness"
+and "unhappiness" apart, which cosine alone scores as repeats. Entries
+expire after ``ttl`` seconds and the least recently used are evicted past
+``max_entries``. Only enabled with ``LLM_RESPONSE_CACHE=1`` and never for a
+session that came in with a participant id.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+
+import streamlit as st
+
+from .streaming import api_messages
+
+RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE", "") == "1"
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.9"))
+HASH_DIMENSIONS = 2**18
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+# Words that may differ between two phrasings of the same question. Negations
+# ("not", "no", "never") are deliberately missing: they change the answer.
+STOP_WORDS = frozenset(
+    "a an the and or but if of to in on at for with about from by as is are was were be been being "
+    "do does did can could would should will shall may might must i me my you your it its this that "
+    "these those there here what which how please just so some any".split()
+)
+
+
+def vectorize(text):
+    """L2-normalised hashed unigram + bigram counts, as {index: weight}."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    counts = defaultdict(float)
+    for feature in [*words, *(" ".join(pair) for pair in zip(words, words[1:]))]:
+        counts[zlib.crc32(feature.encode("utf-8")) % HASH_DIMENSIONS] += 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    return {k: v / norm for k, v in counts.items()} if norm else {}
+
+
+def content_words(text):
+    return frozenset(TOKEN_PATTERN.findall(text.lower())) - STOP_WORDS
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def cache_scope(model, messages):
+    # Everything but the latest message's text must match exactly
+    last = messages[-1]
+    earlier = json.dumps([model, api_messages(messages[:-1]), last.get("essay_context")])
+    return hashlib.sha256(earlier.encode("utf-8")).hexdigest()
+
+
+def response_cache_enabled(participant_id):
+    # Study sessions always reach the model
+    return RESPONSE_CACHE and not participant_id
+
+
+class ResponseCache:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, threshold=CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (scope, text) -> (vector, content words, content, stored_at)
+        self._lock = threading.Lock()
+
+    def get(self, model, messages):
+        """The best cached reply for ``messages`` as {content, similarity, age}, or None."""
+        scope = cache_scope(model, messages)
+        vector = vectorize(messages[-1]["content"])
+        words = content_words(messages[-1]["content"])
+        now = time.monotonic()
+        best, best_key, best_score = None, None, self.threshold
+        with self._lock:
+            for key, (cached, cached_words, content, stored_at) in list(self._entries.items()):
+                if now - stored_at > self.ttl:
+                    del self._entries[key]
+                    continue
+                if key[0] != scope or cached_words != words:
+                    continue
+                score = cosine(vector, cached)
+                if score >= best_score:
+                    best, best_key, best_score = (content, stored_at), key, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+        content, stored_at = best
+        return {"content": content, "similarity": round(best_score, 3), "age": round(now - stored_at, 1)}
+
+    def put(self, model, messages, content):
+        key = (cache_scope(model, messages), messages[-1]["content"])
+        with self._lock:
+            self._entries[key] = (vectorize(key[1]), content_words(key[1]), content, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
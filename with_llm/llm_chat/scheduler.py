@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "120"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "180"))
+
+# How often a waiting session wakes up to re-check its place in line
+POLL_INTERVAL = 0.5
+WINDOW = 60.0
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class Ticket:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.entry = None
+        self.queue_wait = 0.0
+
+
+class LLMScheduler:
+    """Process-wide FIFO gate in front of the completion call.
+
+    At most ``max_in_flight`` requests run at once, and the rolling one-minute
+    window never exceeds ``requests_per_minute`` / ``tokens_per_minute``.
+    Requests that cannot start wait in arrival order.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE):
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._window = deque()  # [started_at, tokens] for requests in the last minute
+        self._in_flight = 0
+
+    def _budget_delay(self, tokens):
+        # Seconds until the rolling window has room for this request (0 if it fits now)
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= WINDOW:
+            self._window.popleft()
+        if not self._window:
+            return 0.0
+        used_tokens = sum(entry[1] for entry in self._window)
+        if len(self._window) < self.requests_per_minute and used_tokens + tokens <= self.tokens_per_minute:
+            return 0.0
+        return max(WINDOW - (now - self._window[0][0]), 0.01)
+
+    def _try_start(self, ticket):
+        if self._queue[0] is not ticket or self._in_flight >= self.max_in_flight:
+            return None
+        delay = self._budget_delay(ticket.tokens)
+        if delay:
+            return delay
+        self._queue.popleft()
+        self._in_flight += 1
+        ticket.entry = [time.monotonic(), ticket.tokens]
+        self._window.append(ticket.entry)
+        self._cond.notify_all()
+        return 0.0
+
+    def acquire(self, tokens=0, on_wait=None, timeout=QUEUE_TIMEOUT, cancelled=None):
+        """Block until this request may start.
+
+        ``on_wait(position)`` reports the 1-based place in line while waiting,
+        and 0 once the request is admitted. Setting the ``cancelled`` event
+        takes the request out of the queue.
+        """
+        ticket = Ticket(tokens)
+        start = time.monotonic()
+        reported = None
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    if cancelled is not None and cancelled.is_set():
+                        raise RequestCancelled()
+                    delay = self._try_start(ticket)
+                    if delay == 0.0:
+                        ticket.queue_wait = time.monotonic() - start
+                        break
+                    position = self._queue.index(ticket) + 1
+                    if position == reported or on_wait is None:
+                        if time.monotonic() - start > timeout:
+                            raise TimeoutError("Timed out waiting for a free LLM slot")
+                        self._cond.wait(min(delay or POLL_INTERVAL, POLL_INTERVAL))
+                        continue
+                # Report outside the lock so a slow UI update never stalls other sessions
+                reported = position
+                on_wait(position)
+            if reported is not None:
+                on_wait(0)
+            return ticket
+        except BaseException:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    self._cond.notify_all()
+            raise
+
+    def try_acquire(self, tokens=0):
+        """Start a request only if nobody is waiting and it fits right now.
+
+        For background traffic that may only use spare capacity: returns
+        None instead of queueing, so it never delays a participant.
+        """
+        with self._cond:
+            if self._queue or self._in_flight >= self.max_in_flight or self._budget_delay(tokens):
+                return None
+            ticket = Ticket(tokens)
+            self._in_flight += 1
+            ticket.entry = [time.monotonic(), tokens]
+            self._window.append(ticket.entry)
+            return ticket
+
+    def release(self, ticket, tokens=None):
+        with self._cond:
+            if tokens is not None:
+                ticket.entry[1] = tokens
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def wake(self):
+        # Let waiting requests re-check their cancellation flag right away
+        with self._cond:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens=0, on_wait=None):
+        ticket = self.acquire(tokens, on_wait=on_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": sum(entry[1] for entry in self._window),
+            }
+
+
+class TokenBucket:
+    def __init__(self, capacity, per_second):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def wait_time(self, amount):
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.per_second
+
+    def take(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class SessionRateLimit:
+    """Per-participant limits on messages and prompt tokens.
+
+    Lives in ``st.session_state``, so one participant sending in rapid
+    succession only slows themselves down, not the rest of the batch.
+    """
+
+    def __init__(self, messages_per_minute=6, burst=3, tokens_per_minute=60000):
+        self.messages = TokenBucket(burst, messages_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+
+    def check(self, tokens):
+        """Return 0 and use up budget if the message may be sent, else the seconds to wait."""
+        wait = max(self.messages.wait_time(1), self.tokens.wait_time(tokens))
+        if wait:
+            return wait
+        self.messages.take(1)
+        self.tokens.take(tokens)
+        return 0.0
+
+
+@st.cache_resource
+def get_scheduler():
+    return LLMScheduler()
@@ -0,0 +1,91 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import streamlit as st
+
+from .accounting import count_message_tokens
+from .streaming import ChatStream
+
+# Shadow requests never queue behind (or in front of) participant traffic:
+# they get their own small pool and are dropped when it is busy
+SHADOW_WORKERS = 4
+
+
+class ShadowMirror:
+    """Mirrors a sample of finished chat requests to a candidate model.
+
+    Runs entirely off the request path: the participant only ever sees the
+    primary answer, and shadow failures are recorded, never raised. Each
+    shadow result goes to ``sink(record)`` for offline comparison.
+
+    Shadow calls share the participants' API key, so with a ``scheduler``
+    they count against its budget but only run on spare capacity: a shadow
+    that cannot start at once, or would start while participants are
+    queued, is dropped.
+    """
+
+    def __init__(self, client, candidate_model, sample_rate, sink, scheduler=None, max_pending=2 * SHADOW_WORKERS):
+        self.client = client
+        self.candidate_model = candidate_model
+        self.sample_rate = sample_rate
+        self.sink = sink
+        self.scheduler = scheduler
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=SHADOW_WORKERS, thread_name_prefix="llm-shadow")
+
+    def maybe_mirror(self, messages, primary, labels=None):
+        if random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        self._pool.submit(self._run, messages, primary, labels or {})
+        return True
+
+    def _run(self, messages, primary, labels):
+        ticket = shadow = None
+        try:
+            if self.scheduler is not None:
+                ticket = self.scheduler.try_acquire(count_message_tokens(messages))
+                if ticket is None:
+                    with self._lock:
+                        self.dropped += 1
+                    return
+            shadow = ChatStream(self.client, self.candidate_model, messages, retry=None)
+            for _ in shadow:
+                pass
+            usage = shadow.as_message()["usage"]
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                **labels,
+                "candidate_model": self.candidate_model,
+                "candidate_ttft": shadow.ttft,
+                "candidate_latency": shadow.latency,
+                "candidate_usage": usage,
+                "candidate_error": repr(shadow.error) if shadow.error else None,
+                "candidate_output": "" if shadow.error else shadow.text,
+                "primary_model": primary.get("route", {}).get("model"),
+                "primary_timing": primary.get("timing"),
+                "primary_usage": primary.get("usage"),
+                "primary_chars": len(primary.get("content", "")),
+            }
+            self.sink(record)
+        except Exception as e:
+            print(f"[llm shadow] {e!r}")
+        finally:
+            if ticket is not None:
+                self.scheduler.release(ticket, shadow.tokens_used if shadow is not None else None)
+            with self._lock:
+                self._pending -= 1
+
+
+@st.cache_resource
+def get_shadow_mirror(_client, candidate_model, sample_rate, _sink, _scheduler=None):
+    return ShadowMirror(_client, candidate_model, sample_rate, _sink, scheduler=_scheduler)
@@ -0,0 +1,275 @@
+import threading
+import time
+
+from .accounting import count_message_tokens, count_tokens
+from .resilience import CircuitOpenError, HedgedStream, RetryPolicy, is_retryable
+from .scheduler import RequestCancelled
+from .telemetry import call_record, telemetry
+
+
+def message_content(message):
+    # Essay excerpts attached to a user turn travel in front of what the participant typed
+    if message.get("essay_context"):
+        return f"{message['essay_context']}\n\n---\n\n{message['content']}"
+    return message["content"]
+
+
+def api_messages(messages):
+    # Stored turns carry extra bookkeeping (timings etc.), the API only wants role/content.
+    # Cancelled replies were never finished, so the model does not see them.
+    return [{"role": m["role"], "content": message_content(m)} for m in messages if not m.get("cancelled")]
+
+
+def usage_record(usage):
+    # Cached vs uncached prompt tokens show how often the stable prompt prefix hit the provider cache
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_prompt_tokens": cached,
+        "uncached_prompt_tokens": usage.prompt_tokens - cached,
+        "completion_tokens": usage.completion_tokens,
+    }
+
+
+class ChatStream:
+    """Iterates over an assistant reply as it arrives from the API.
+
+    Hand it to ``st.write_stream`` to render tokens as they come in. Once it
+    is exhausted, ``text`` holds the full reply and ``ttft`` / ``latency``
+    the time to first token and total time in seconds. With a ``scheduler``
+    the request first waits for a free slot; ``on_wait(position)`` is called
+    while it is queued.
+
+    Transient errors before the first token are retried according to
+    ``retry``. With a ``hedge_route`` (model and extra request parameters,
+    e.g. a different OpenRouter provider) a duplicate request is sent if no
+    token has arrived after ``hedge_after`` seconds, and the faster one wins;
+    the duplicate takes its own scheduler slot, and the loser's connection
+    is closed as soon as the race is decided.
+    A ``breaker`` fails the turn straight away while the backend is down.
+    ``cancel()`` (callable from any thread) stops the request, closes its
+    connection and frees its scheduler slot. Every finished call is fed to
+    the process-wide ``telemetry``.
+    """
+
+    def __init__(self, client, model, messages, stream=True, scheduler=None, on_wait=None,
+                 retry=RetryPolicy(), hedge_route=None, hedge_after=5.0, breaker=None, **params):
+        # Retries are handled here, so the SDK's own retry loop is switched off
+        self.client = client.with_options(max_retries=0) if retry else client
+        self.model = model
+        self.messages = messages
+        self.stream = stream
+        self.scheduler = scheduler
+        self.on_wait = on_wait
+        self.retry = retry
+        self.hedge_route = hedge_route
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+        self.params = params
+        self.text = ""
+        self.queue_wait = 0.0
+        self.ttft = None
+        self.latency = None
+        self.usage = None
+        self.error = None
+        self.attempts = 0
+        self.hedged = False
+        self.model_used = model
+        self.cancelled = threading.Event()
+        self.cancel_reason = None
+        self.record = None
+        self._responses = []
+        self._responses_lock = threading.Lock()
+        # Per hedged route: set once it has lost (or the call is cancelled), and its open response
+        self._lost = {}
+        self._route_responses = {}
+        # Tokens each route actually used, summed over retries, for the scheduler's budget
+        self._route_tokens = {}
+
+    @property
+    def tokens_used(self):
+        """Prompt plus completion tokens over every attempt and route."""
+        return sum(self._route_tokens.values())
+
+    def cancel(self, reason="cancelled"):
+        self.cancel_reason = reason
+        self.cancelled.set()
+        with self._responses_lock:
+            responses = list(self._responses)
+            for lost in self._lost.values():
+                lost.set()
+        # Closing the connection also unblocks a worker stuck waiting on the next chunk
+        for response in responses:
+            try:
+                response.close()
+            except Exception:
+                pass
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def _close_route(self, index):
+        # Called by HedgedStream for each attempt that lost the race
+        with self._responses_lock:
+            self._lost[index].set()
+            response = self._route_responses.get(index)
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def _request(self, route, index=0):
+        route = dict(route)
+        model = route.pop("model")
+        lost = self._lost.get(index)
+        ticket = None
+        if index > 0 and self.scheduler is not None:
+            # A hedge is a request of its own: it waits for a slot and counts against the budget
+            ticket = self.scheduler.acquire(count_message_tokens(self.messages), cancelled=lost)
+        usage = None
+        completion = []
+        try:
+            if not self.stream:
+                response = self.client.chat.completions.create(model=model, messages=self.messages, **route)
+                usage = response.usage
+                completion.append(response.choices[0].message.content or "")
+                yield "usage", usage
+                yield "delta", completion[0]
+                return
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=self.messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **route,
+            )
+            with self._responses_lock:
+                self._responses.append(response)
+                self._route_responses[index] = response
+            try:
+                # The race may have been decided while this request was being opened
+                if lost is not None and lost.is_set():
+                    raise RequestCancelled()
+                for chunk in response:
+                    if self.cancelled.is_set():
+                        raise RequestCancelled()
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                        yield "usage", usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        completion.append(chunk.choices[0].delta.content)
+                        yield "delta", completion[-1]
+            finally:
+                response.close()
+        finally:
+            # Provider-reported usage, or a local count when the stream ended without it
+            if usage is not None:
+                used = usage.prompt_tokens + usage.completion_tokens
+            else:
+                used = count_message_tokens(self.messages) + count_tokens("".join(completion))
+            self._route_tokens[index] = self._route_tokens.get(index, 0) + used
+            if ticket is not None:
+                self.scheduler.release(ticket, used)
+
+    def _generate(self, start):
+        routes = [{"model": self.model, **self.params}]
+        if self.hedge_route:
+            routes.append({**self.params, **self.hedge_route})
+        attempts = self.retry.attempts if self.retry else 1
+
+        for attempt in range(attempts):
+            self.attempts += 1
+            got_output = False
+            if len(routes) == 1:
+                items = self._request(routes[0])
+            else:
+                with self._responses_lock:
+                    self._lost = {i: threading.Event() for i in range(len(routes))}
+                    self._route_responses = {}
+                if self.cancelled.is_set():
+                    raise RequestCancelled()
+                items = HedgedStream(
+                    [lambda route=route, i=i: self._request(route, i) for i, route in enumerate(routes)],
+                    self.hedge_after,
+                    on_cancel=self._close_route,
+                )
+            try:
+                for kind, value in items:
+                    if kind == "usage":
+                        self.usage = value
+                        continue
+                    if not got_output:
+                        got_output = True
+                        if self.ttft is None:
+                            self.ttft = time.perf_counter() - start
+                        if len(routes) > 1:
+                            self.hedged = items.winner > 0
+                            self.model_used = routes[items.winner]["model"]
+                    yield value
+                return
+            except Exception as e:
+                if self.cancelled.is_set():
+                    # Errors from a connection closed by cancel() are not worth retrying
+                    raise RequestCancelled() from e
+                # Once tokens are on screen a retry would duplicate them, so only retry before that
+                if got_output or attempt + 1 >= attempts or not is_retryable(e):
+                    raise
+                if self.cancelled.wait(self.retry.delay(attempt)):
+                    raise RequestCancelled() from e
+
+    def __iter__(self):
+        ticket = None
+        start = time.perf_counter()
+        parts = []
+        try:
+            if self.cancelled.is_set():
+                raise RequestCancelled()
+            if self.breaker is not None:
+                self.breaker.before_call()
+            if self.scheduler is not None:
+                ticket = self.scheduler.acquire(
+                    count_message_tokens(self.messages), on_wait=self.on_wait, cancelled=self.cancelled
+                )
+                self.queue_wait = ticket.queue_wait
+                start = time.perf_counter()
+            for delta in self._generate(start):
+                parts.append(delta)
+                yield delta
+        except RequestCancelled:
+            self.cancel_reason = self.cancel_reason or "cancelled"
+        except Exception as e:
+            self.error = e
+            error_text = str(e) if isinstance(e, CircuitOpenError) else f"⚠️ API Error: {e}"
+            if parts:
+                error_text = "\n\n" + error_text
+            parts.append(error_text)
+            yield error_text
+        finally:
+            if ticket is not None:
+                # The primary route's real token count replaces the prompt-only estimate
+                self.scheduler.release(ticket, self._route_tokens.get(0))
+            self.latency = time.perf_counter() - start
+            self.text = "".join(parts)
+            self.record = telemetry.record(self)
+            if self.breaker is not None and not isinstance(self.error, CircuitOpenError) and not self.cancel_reason:
+                # Bad requests (4xx) say nothing about backend health
+                failed = self.error is not None and is_retryable(self.error)
+                self.breaker.record(failed, self.ttft if self.ttft is not None else self.latency)
+
+    def as_message(self, usage=None):
+        message = {
+            "role": "assistant",
+            "content": self.text,
+            # Compact latency record: queue wait, TTFT, latency, tokens/s and error class
+            "timing": {k: v for k, v in (self.record or call_record(self)).items() if k != "model"},
+            "usage": usage if usage is not None else usage_record(self.usage),
+            "route": {"model": self.model_used, "attempts": self.attempts, "hedged": self.hedged},
+        }
+        if self.cancel_reason:
+            message["cancelled"] = self.cancel_reason
+        return message
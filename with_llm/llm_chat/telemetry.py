@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# Histogram upper bounds: seconds for waits and latencies, tokens/s for throughput
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+THROUGHPUT_BUCKETS = (5, 10, 20, 40, 80, 160, 320)
+# Set LLM_METRICS_PATH to have the snapshot written there every METRICS_INTERVAL seconds
+METRICS_PATH = os.getenv("LLM_METRICS_PATH")
+METRICS_INTERVAL = float(os.getenv("LLM_METRICS_INTERVAL", "60"))
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are read off the bucket bounds."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        cumulative, seen = {}, 0
+        for bound, count in zip([*self.bounds, "+Inf"], self.counts):
+            seen += count
+            cumulative[str(bound)] = seen
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": cumulative,
+        }
+
+
+class Telemetry:
+    """Process-wide LLM call metrics, labelled by model.
+
+    ``record(reply)`` takes a finished ChatStream, feeds the histograms and
+    returns its compact per-call record. Cancelled calls are only counted,
+    since their timings stop early.
+    """
+
+    metrics = {
+        "queue_wait": LATENCY_BUCKETS,
+        "ttft": LATENCY_BUCKETS,
+        "latency": LATENCY_BUCKETS,
+        "tokens_per_second": THROUGHPUT_BUCKETS,
+    }
+
+    def __init__(self):
+        self.started = time.time()
+        self.calls = Counter()
+        self.errors = Counter()
+        self.cancelled = Counter()
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def record(self, reply):
+        record = call_record(reply)
+        model = record["model"]
+        with self._lock:
+            self.calls[model] += 1
+            if reply.cancel_reason:
+                self.cancelled[model] += 1
+                return record
+            if record["error"]:
+                self.errors[(model, record["error"])] += 1
+            for metric, bounds in self.metrics.items():
+                if record[metric] is not None:
+                    key = (metric, model)
+                    if key not in self._histograms:
+                        self._histograms[key] = Histogram(bounds)
+                    self._histograms[key].observe(record[metric])
+        if METRICS_PATH and self._exporter is None:
+            self._start_exporter()
+        return record
+
+    def snapshot(self):
+        with self._lock:
+            models = {}
+            for (metric, model), histogram in sorted(self._histograms.items()):
+                models.setdefault(model, {})[metric] = histogram.snapshot()
+            for model, calls in self.calls.items():
+                entry = models.setdefault(model, {})
+                entry["calls"] = calls
+                entry["cancelled"] = self.cancelled[model]
+                entry["errors"] = {error: n for (m, error), n in self.errors.items() if m == model}
+        return {"since": self.started, "at": time.time(), "models": models}
+
+    def _start_exporter(self):
+        def export():
+            while True:
+                time.sleep(METRICS_INTERVAL)
+                tmp = METRICS_PATH + ".tmp"
+                try:
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(self.snapshot(), f)
+                    os.replace(tmp, METRICS_PATH)
+                except OSError as e:
+                    print(f"[llm metrics] {e!r}")
+
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(target=export, name="llm-metrics-export", daemon=True)
+        self._exporter.start()
+
+
+def call_record(reply):
+    """Queue wait, time to first token, latency, throughput and error class of one call."""
+    completion_tokens = reply.usage.completion_tokens if reply.usage is not None else None
+    generating = reply.latency - reply.ttft if reply.ttft is not None and reply.latency is not None else None
+    tokens_per_second = None
+    # A non-streamed reply arrives all at once, so it has no generation rate
+    if reply.stream and completion_tokens and generating and generating > 0:
+        tokens_per_second = round(completion_tokens / generating, 1)
+    return {
+        "model": reply.model_used,
+        "queue_wait": round(reply.queue_wait, 3),
+        "ttft": round(reply.ttft, 3) if reply.ttft is not None else None,
+        "latency": round(reply.latency, 3) if reply.latency is not None else None,
+        "tokens_per_second": tokens_per_second,
+        "error": type(reply.error).__name__ if reply.error else None,
+    }
+
+
+telemetry = Telemetry()
+
+
+def metrics_snapshot():
+    return telemetry.snapshot()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "32"))
+# How often the chat fragment re-renders while a reply is being generated
+POLL_INTERVAL = 0.5
+# How often pending turns are checked for sessions that went away
+REAP_INTERVAL = 5.0
+
+_active_turns = set()
+_active_lock = threading.Lock()
+
+
+class ChatTurn:
+    """An assistant reply being generated on the worker pool.
+
+    The worker appends deltas to ``parts`` and its queue position to
+    ``position``; the chat fragment polls them until ``done()``. Workers have
+    no script context, so they must not touch ``st`` or ``st.session_state``.
+    A turn belongs to one session; ``cancel()`` stops the attached requests.
+    A fan-out turn shows each model's reply live in its own list in ``panels``.
+    """
+
+    def __init__(self, session_id=None, key=None):
+        self.session_id = session_id
+        self.key = key
+        self.parts = []
+        self.panels = None
+        self.position = 0
+        self.future = None
+        self.streams = []
+        self.cancel_reason = None
+        self._lock = threading.Lock()
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def set_position(self, position):
+        self.position = position
+
+    def attach(self, stream):
+        # A turn cancelled before its request was built cancels the request on arrival
+        with self._lock:
+            self.streams.append(stream)
+            reason = self.cancel_reason
+        if reason:
+            stream.cancel(reason)
+
+    def cancel(self, reason):
+        with self._lock:
+            self.cancel_reason = reason
+            streams = list(self.streams)
+        for stream in streams:
+            stream.cancel(reason)
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        try:
+            return self.future.result()
+        except Exception as e:
+            return {"role": "assistant", "content": f"⚠️ API Error: {e}"}
+
+    def cancelled_message(self):
+        # Recorded right away, so the participant can move on without waiting for the worker
+        message = {"role": "assistant", "content": self.text, "cancelled": self.cancel_reason}
+        if self.panels is not None:
+            message["content"] = "".join(self.panels[0])
+            message["fanout"] = "side_by_side"
+            message["responses"] = [{"content": "".join(parts)} for parts in self.panels]
+        return message
+
+
+def _session_alive(session_id):
+    if session_id is None or not runtime.exists():
+        return True
+    return runtime.get_instance().is_active_session(session_id)
+
+
+def _reap_disconnected():
+    while True:
+        time.sleep(REAP_INTERVAL)
+        with _active_lock:
+            turns = list(_active_turns)
+        for turn in turns:
+            if not _session_alive(turn.session_id):
+                turn.cancel("disconnected")
+
+
+@st.cache_resource
+def get_worker_pool():
+    threading.Thread(target=_reap_disconnected, name="llm-turn-reaper", daemon=True).start()
+    return ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm-turn")
+
+
+def turn_key(turn_index, content):
+    """Identifies one submission: the session, the message's index and its text."""
+    ctx = get_script_run_ctx()
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return (ctx.session_id if ctx else None, turn_index, digest)
+
+
+def submit_turn(generate, key=None):
+    """Run ``generate(turn)`` on the shared pool; it must return the assistant message."""
+    ctx = get_script_run_ctx()
+    turn = ChatTurn(session_id=ctx.session_id if ctx else None, key=key)
+
+    def run():
+        try:
+            return generate(turn)
+        finally:
+            with _active_lock:
+                _active_turns.discard(turn)
+
+    with _active_lock:
+        _active_turns.add(turn)
+    turn.future = get_worker_pool().submit(run)
+    return turn
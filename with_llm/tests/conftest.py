@@ -0,0 +1,5 @@
+import os
+import sys
+
+# llm_chat is imported the way the apps import it, from the with_llm directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,68 @@
+import pytest
+
+from llm_chat.grammar import check_text, is_grammar_request
+
+
+@pytest.mark.parametrize("passage", [
+    "I read about it on google.com yesterday.",
+    "See https://example.org/essay?id=3 for the full text.",
+    "Write to me at jane.doe@uni.edu when you can.",
+    "The U.S. report came out last week.",
+    "Some things, e.g. a house, cost a lot.",
+    "Dr. smith and Mr. jones disagreed.",
+    "It cost 3.5 million, or 10:30 of work.",
+    "He had had enough of it.",
+    "It was a one-time payment.",
+    "It took an hour.",
+    "I cant go and I wont go.",
+])
+def test_correct_or_out_of_scope_text_is_left_alone(passage):
+    assert check_text(passage) == (passage, [])
+
+
+def test_real_mistakes_are_fixed():
+    corrected, issues = check_text("i think money doesnt help,honestly. it could of helped")
+    assert corrected == "I think money doesn't help, honestly. It could have helped."
+    assert {issue[2] for issue in issues} >= {
+        "spelling",
+        "missing space after punctuation",
+        "sentence should start with a capital letter",
+        "missing final punctuation",
+    }
+
+
+def test_sentence_after_a_domain_still_gets_a_capital():
+    corrected, _ = check_text("I use google.com. it is fast.")
+    assert corrected == "I use google.com. It is fast."
+
+
+PARAGRAPH = (
+    "Money can buy comfort and security, but many studies suggest that beyond a certain income "
+    "people do not become much happier, because they adapt quickly to what they have."
+)
+
+
+@pytest.mark.parametrize("ask", [
+    "Can you check the grammar of this paragraph?",
+    "Please fix any spelling mistakes:",
+    "Could you look over this for typos?",
+    "Proofread this please:",
+    "Grammar check:",
+])
+def test_explicit_grammar_asks_are_detected(ask):
+    assert is_grammar_request(f"{ask}\n{PARAGRAPH}")
+
+
+@pytest.mark.parametrize("ask", [
+    "Is this paragraph convincing? Check it:",
+    "Does this make sense? look over it please:",
+    "Can you check this paragraph for me?",
+    "Check the grammar and make the argument stronger:",
+    "Fix this:",
+])
+def test_open_ended_asks_go_to_the_model(ask):
+    assert not is_grammar_request(f"{ask}\n{PARAGRAPH}")
+
+
+def test_short_pastes_go_to_the_model():
+    assert not is_grammar_request("Check the spelling: recieve")
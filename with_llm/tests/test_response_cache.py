@@ -0,0 +1,44 @@
+import pytest
+
+from llm_chat.response_cache import ResponseCache
+
+MODEL = "openai/gpt-4o-mini"
+
+
+def ask(text, earlier=()):
+    return [*earlier, {"role": "user", "content": text}]
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache()
+    cache.put(MODEL, ask("Does money lead to happiness?"), "cached reply")
+    return cache
+
+
+def test_repeated_question_hits(cache):
+    hit = cache.get(MODEL, ask("does money lead to happiness"))
+    assert hit["content"] == "cached reply"
+    assert hit["similarity"] == 1.0
+
+
+@pytest.mark.parametrize("text", [
+    "Does money lead to unhappiness?",
+    "Does money not lead to happiness?",
+    "Does no money lead to happiness?",
+    "Does money lead to happiness and health?",
+])
+def test_near_miss_negations_miss(cache, text):
+    assert cache.get(MODEL, ask(text)) is None
+
+
+def test_other_model_or_conversation_misses(cache):
+    assert cache.get("openai/gpt-5.2", ask("Does money lead to happiness?")) is None
+    earlier = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello!"}]
+    assert cache.get(MODEL, ask("Does money lead to happiness?", earlier)) is None
+
+
+def test_hit_and_miss_counts(cache):
+    cache.get(MODEL, ask("Does money lead to happiness?"))
+    cache.get(MODEL, ask("Does money lead to unhappiness?"))
+    assert cache.snapshot() == {"entries": 1, "hits": 1, "misses": 1}
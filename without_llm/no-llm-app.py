@@ -168,55 +168,62 @@ if st.session_state.show_prestudy:
 
     likert = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-    # Required Pre-Study Questions
-    st.session_state.prestudy["struggle_structure"] = st.radio(
-        "I often struggle with structuring my ideas clearly.", likert, index=None, horizontal=True
-    )
-
-    st.session_state.prestudy["confident_writer"] = st.radio(
-        "I feel confident in my ability to write and edit essays on my own.", likert, index=None, horizontal=True
-    )
-
-    st.session_state.prestudy["writing_time"] = st.radio(
-        "I find essay writing time-consuming.", likert, index=None, horizontal=True
-    )
-
-    st.session_state.prestudy["writing_enjoyable"] = st.radio(
-        "I usually find essay writing enjoyable.", likert, index=None, horizontal=True
-    )
-
-    st.session_state.prestudy["llm_use_frequency"] = st.radio(
-        "I use LLMs to help me write:",
-        ["Daily", "Weekly", "Monthly", "Checked it out a few times", "Never"],
-        index=None,
-        horizontal=True,
-    )
-
-    st.session_state.prestudy["llm_use_purpose"] = st.multiselect(
-        "What do you use LLMs for?",
-        [
-            "I don’t use LLMs",
-            "General conversation",
-            "Search queries / seeking knowledge (e.g., health)",
-            "Learning or understanding new concepts",
-            "Advice",
-            "Writing or editing text",
-            "Work or productivity tasks",
-            "Other (please specify)",
-        ],
-    )
+    with st.form("prestudy_form", enter_to_submit=False):
+        # Required Pre-Study Questions
+        st.session_state.prestudy["struggle_structure"] = st.radio(
+            "I often struggle with structuring my ideas clearly.", likert, index=None, horizontal=True
+        )
+
+        st.session_state.prestudy["confident_writer"] = st.radio(
+            "I feel confident in my ability to write and edit essays on my own.", likert, index=None, horizontal=True
+        )
+
+        st.session_state.prestudy["writing_time"] = st.radio(
+            "I find essay writing time-consuming.", likert, index=None, horizontal=True
+        )
+
+        st.session_state.prestudy["writing_enjoyable"] = st.radio(
+            "I usually find essay writing enjoyable.", likert, index=None, horizontal=True
+        )
+
+        st.session_state.prestudy["llm_use_frequency"] = st.radio(
+            "I use LLMs to help me write:",
+            ["Daily", "Weekly", "Monthly", "Checked it out a few times", "Never"],
+            index=None,
+            horizontal=True,
+        )
+
+        st.session_state.prestudy["llm_use_purpose"] = st.multiselect(
+            "What do you use LLMs for?",
+            [
+                "I don’t use LLMs",
+                "General conversation",
+                "Search queries / seeking knowledge (e.g., health)",
+                "Learning or understanding new concepts",
+                "Advice",
+                "Writing or editing text",
+                "Work or productivity tasks",
+                "Other (please specify)",
+            ],
+        )
+
+        # Always shown inside the form; only kept (and required) when "Other" is selected
+        llm_use_purpose_other = st.text_input('If you selected "Other", please specify:', key="llm_use_purpose_other")
+        if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
+            st.session_state.prestudy["llm_use_purpose_other"] = llm_use_purpose_other
+        else:
+            st.session_state.prestudy.pop("llm_use_purpose_other", None)
 
-    if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
-        st.session_state.prestudy["llm_use_purpose_other"] = st.text_input("Please specify:")
+        st.session_state.prestudy["llm_last_experience"] = st.text_area(
+            "Please describe the last time you used a large language model (LLM). "
+            "What did you use it for, in what context, and how helpful was it?"
+        )
 
-    st.session_state.prestudy["llm_last_experience"] = st.text_area(
-        "Please describe the last time you used a large language model (LLM). "
-        "What did you use it for, in what context, and how helpful was it?"
-    )
+        st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
+        submitted = st.form_submit_button("Start Writing")
 
-    if st.button("Start Writing"):
+    if submitted:
         missing = unanswered_fields(st.session_state.prestudy)
         if missing:
             st.markdown('<p class="missing">⚠️ Please answer all questions before continuing.</p>',
@@ -263,38 +270,41 @@ if st.session_state.show_survey and not st.session_state.show_prestudy and not s
 
     likert = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-    st.session_state.poststudy["satisfied_with_essay"] = st.radio(
-        "I was satisfied with the essay.", likert, index=None, horizontal=True
-    )
+    with st.form("poststudy_form", enter_to_submit=False):
+        st.session_state.poststudy["satisfied_with_essay"] = st.radio(
+            "I was satisfied with the essay.", likert, index=None, horizontal=True
+        )
 
-    st.session_state.poststudy["creativity_level"] = st.radio(
-        "How creative do you feel you were in writing the essay?",
-        ["Very creative", "Somewhat creative", "Neither creative nor uncreative",
-         "Somewhat uncreative", "Not at all creative"],
-        index=None,
-    )
+        st.session_state.poststudy["creativity_level"] = st.radio(
+            "How creative do you feel you were in writing the essay?",
+            ["Very creative", "Somewhat creative", "Neither creative nor uncreative",
+             "Somewhat uncreative", "Not at all creative"],
+            index=None,
+        )
 
-    st.session_state.poststudy["essay_in_my_voice"] = st.radio(
-        "I felt the essay was written in my voice.", likert, index=None, horizontal=True
-    )
+        st.session_state.poststudy["essay_in_my_voice"] = st.radio(
+            "I felt the essay was written in my voice.", likert, index=None, horizontal=True
+        )
 
-    st.session_state.poststudy["difficult_to_organize"] = st.radio(
-        "I found it difficult to organize my thoughts while writing.", likert, index=None, horizontal=True
-    )
+        st.session_state.poststudy["difficult_to_organize"] = st.radio(
+            "I found it difficult to organize my thoughts while writing.", likert, index=None, horizontal=True
+        )
 
-    st.session_state.poststudy["writing_struggle"] = st.radio(
-        "Writing this essay was a struggle for me.", likert, index=None, horizontal=True
-    )
+        st.session_state.poststudy["writing_struggle"] = st.radio(
+            "Writing this essay was a struggle for me.", likert, index=None, horizontal=True
+        )
 
-    st.session_state.poststudy["essay_experience"] = st.text_area(
-        "Please describe your experience writing this essay. "
-        "Comment on how well it reflects your views and voice, the effort you put in, "
-        "and whether you learned anything."
-    )
+        st.session_state.poststudy["essay_experience"] = st.text_area(
+            "Please describe your experience writing this essay. "
+            "Comment on how well it reflects your views and voice, the effort you put in, "
+            "and whether you learned anything."
+        )
+
+        st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
+        submitted = st.form_submit_button("Submit Feedback")
 
-    if st.button("Submit Feedback"):
+    if submitted:
         missing = unanswered_fields(st.session_state.poststudy)
         if missing:
             st.markdown('<p class="missing">⚠️ Please answer all questions before submitting.</p>',
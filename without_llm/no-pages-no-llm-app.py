@@ -170,53 +170,68 @@ st.subheader("🧠 Pre-Study Questions")
 
 likert = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-# Required Pre-Study Questions
-st.session_state.prestudy["struggle_structure"] = st.radio(
-    "I often struggle with structuring my ideas clearly.", likert, index=None, horizontal=True
-)
-
-st.session_state.prestudy["confident_writer"] = st.radio(
-    "I feel confident in my ability to write and edit essays on my own.", likert, index=None, horizontal=True
-)
-
-st.session_state.prestudy["writing_time"] = st.radio(
-    "I find essay writing time-consuming.", likert, index=None, horizontal=True
-)
-
-st.session_state.prestudy["writing_enjoyable"] = st.radio(
-    "I usually find essay writing enjoyable.", likert, index=None, horizontal=True
-)
-
-st.session_state.prestudy["llm_use_frequency"] = st.radio(
-    "I use LLMs to help me write:",
-    ["Daily", "Weekly", "Monthly", "Checked it out a few times", "Never"],
-    index=None,
-    horizontal=True,
-)
+with st.form("prestudy_form", enter_to_submit=False):
+    # Required Pre-Study Questions
+    st.session_state.prestudy["struggle_structure"] = st.radio(
+        "I often struggle with structuring my ideas clearly.", likert, index=None, horizontal=True
+    )
+
+    st.session_state.prestudy["confident_writer"] = st.radio(
+        "I feel confident in my ability to write and edit essays on my own.", likert, index=None, horizontal=True
+    )
+
+    st.session_state.prestudy["writing_time"] = st.radio(
+        "I find essay writing time-consuming.", likert, index=None, horizontal=True
+    )
+
+    st.session_state.prestudy["writing_enjoyable"] = st.radio(
+        "I usually find essay writing enjoyable.", likert, index=None, horizontal=True
+    )
+
+    st.session_state.prestudy["llm_use_frequency"] = st.radio(
+        "I use LLMs to help me write:",
+        ["Daily", "Weekly", "Monthly", "Checked it out a few times", "Never"],
+        index=None,
+        horizontal=True,
+    )
+
+    st.session_state.prestudy["llm_use_purpose"] = st.multiselect(
+        "What do you use LLMs for?",
+        [
+            "I don’t use LLMs",
+            "General conversation",
+            "Search queries / seeking knowledge (e.g., health)",
+            "Learning or understanding new concepts",
+            "Advice",
+            "Writing or editing text",
+            "Work or productivity tasks",
+            "Other (please specify)",
+        ],
+    )
+
+    # Always shown inside the form; only kept (and required) when "Other" is selected
+    llm_use_purpose_other = st.text_input('If you selected "Other", please specify:', key="llm_use_purpose_other")
+    if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
+        st.session_state.prestudy["llm_use_purpose_other"] = llm_use_purpose_other
+    else:
+        st.session_state.prestudy.pop("llm_use_purpose_other", None)
 
-st.session_state.prestudy["llm_use_purpose"] = st.multiselect(
-    "What do you use LLMs for?",
-    [
-        "I don’t use LLMs",
-        "General conversation",
-        "Search queries / seeking knowledge (e.g., health)",
-        "Learning or understanding new concepts",
-        "Advice",
-        "Writing or editing text",
-        "Work or productivity tasks",
-        "Other (please specify)",
-    ],
-)
+    st.session_state.prestudy["llm_last_experience"] = st.text_area(
+        "Please describe the last time you used a large language model (LLM). "
+        "What did you use it for, in what context, and how helpful was it?"
+    )
 
-if "Other (please specify)" in st.session_state.prestudy["llm_use_purpose"]:
-    st.session_state.prestudy["llm_use_purpose_other"] = st.text_input("Please specify:")
+    st.markdown("</div>", unsafe_allow_html=True)
 
-st.session_state.prestudy["llm_last_experience"] = st.text_area(
-    "Please describe the last time you used a large language model (LLM). "
-    "What did you use it for, in what context, and how helpful was it?"
-)
+    # Answers are only committed on submit, so the pre-study block saves on its own
+    prestudy_saved = st.form_submit_button("Save Answers")
 
-st.markdown("</div>", unsafe_allow_html=True)
+if prestudy_saved:
+    if unanswered_fields(st.session_state.prestudy):
+        st.markdown('<p class="missing">⚠️ Please answer all questions before continuing.</p>',
+                    unsafe_allow_html=True)
+    else:
+        st.success("✅ Answers saved. Continue with Part II below.")
 
     # if st.button("Start Writing"):
     #     missing = unanswered_fields(st.session_state.prestudy)
@@ -235,14 +250,15 @@ st.subheader("✍️ Part II: Write Your Essay")
 
 st.markdown("""
     **Essay Prompt**: Is technology making our lives better or worse?
-            
-    
+        
+
     Please write a 300-500 word essay expressing your views on this topic. 
     Do not use an LLM or AI assistant to assist you in writing your essay. 
     If you do, we will be able to detect it and you will not be compensated for your time.
 """)
 
 st.subheader("✍️ Enter Your Writing Here")
+# Outside any form, so every edit reaches session state right away
 st.session_state.essay = st.text_area(
     "Enter your writing or text here:",
     height=600,
@@ -257,43 +273,46 @@ st.session_state.essay = st.text_area(
 
 st.subheader("📝 Post-Study Questions")
 
-likert = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
+with st.form("poststudy_form", enter_to_submit=False):
+    likert = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
 
-st.session_state.poststudy["satisfied_with_essay"] = st.radio(
-    "I was satisfied with the essay.", likert, index=None, horizontal=True
-)
+    st.session_state.poststudy["satisfied_with_essay"] = st.radio(
+        "I was satisfied with the essay.", likert, index=None, horizontal=True
+    )
 
-st.session_state.poststudy["creativity_level"] = st.radio(
-    "How creative do you feel you were in writing the essay?",
-    ["Very creative", "Somewhat creative", "Neither creative nor uncreative",
-        "Somewhat uncreative", "Not at all creative"],
-    index=None,
-)
+    st.session_state.poststudy["creativity_level"] = st.radio(
+        "How creative do you feel you were in writing the essay?",
+        ["Very creative", "Somewhat creative", "Neither creative nor uncreative",
+            "Somewhat uncreative", "Not at all creative"],
+        index=None,
+    )
 
-st.session_state.poststudy["essay_in_my_voice"] = st.radio(
-    "I felt the essay was written in my voice.", likert, index=None, horizontal=True
-)
+    st.session_state.poststudy["essay_in_my_voice"] = st.radio(
+        "I felt the essay was written in my voice.", likert, index=None, horizontal=True
+    )
 
-st.session_state.poststudy["difficult_to_organize"] = st.radio(
-    "I found it difficult to organize my thoughts while writing.", likert, index=None, horizontal=True
-)
+    st.session_state.poststudy["difficult_to_organize"] = st.radio(
+        "I found it difficult to organize my thoughts while writing.", likert, index=None, horizontal=True
+    )
 
-st.session_state.poststudy["writing_struggle"] = st.radio(
-    "Writing this essay was a struggle for me.", likert, index=None, horizontal=True
-)
+    st.session_state.poststudy["writing_struggle"] = st.radio(
+        "Writing this essay was a struggle for me.", likert, index=None, horizontal=True
+    )
 
-st.session_state.poststudy["essay_experience"] = st.text_area(
-    "Please describe your experience writing this essay. "
-    "Comment on how well it reflects your views and voice, the effort you put in, "
-    "and whether you learned anything."
-)
+    st.session_state.poststudy["essay_experience"] = st.text_area(
+        "Please describe your experience writing this essay. "
+        "Comment on how well it reflects your views and voice, the effort you put in, "
+        "and whether you learned anything."
+    )
+
+    st.markdown("</div>", unsafe_allow_html=True)
 
-st.markdown("</div>", unsafe_allow_html=True)
+    submitted = st.form_submit_button("Submit Feedback")
 
-if st.button("Submit Feedback"):
+if submitted:
     missing = unanswered_fields(st.session_state.poststudy) or st.session_state.essay_box == "" or unanswered_fields(st.session_state.prestudy)
     if missing:
-        st.markdown('<p class="missing">⚠️ Please answer all questions before submitting.</p>',
+        st.markdown('<p class="missing">⚠️ Please answer (and save) all questions before submitting.</p>',
                     unsafe_allow_html=True)
     else:
         # Save to Firestore